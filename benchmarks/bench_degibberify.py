@@ -0,0 +1,47 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+"""
+Benchmark the reverse translation engines against each other
+
+usage: PYTHONPATH=. python benchmarks/bench_degibberify.py [n_syllables] [n_words]
+"""
+
+import sys
+import time
+import random
+import string
+
+from gibberify.generate.dicts import GibDict
+from gibberify.translate.reverse import engines, get_engine
+
+
+def reverse_dict(n, rng):
+    """
+    make up a reverse dictionary with n syllables, split in buckets by length like the generated ones
+    """
+    rev = GibDict('gib', 'real', {}, reverse=True)
+    while sum(len(bucket) for bucket in rev.values()) < n:
+        syl = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(1, 6)))
+        rev.setdefault(len(syl), {})[syl] = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(1, 6)))
+    return rev
+
+
+def main():
+    n_syl = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n_words = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    rng = random.Random(0)
+    rev = reverse_dict(n_syl, rng)
+    text = ' '.join(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 12))) for _ in range(n_words))
+
+    print(f'{n_syl} syllables, {n_words} words')
+    for name in sorted(engines):
+        start = time.perf_counter()
+        engine = get_engine(rev, name)
+        built = time.perf_counter()
+        engine.translate(text)
+        done = time.perf_counter()
+        print(f'{name:>6}: build {(built - start) * 1000:9.2f} ms, translate {(done - built) * 1000:9.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
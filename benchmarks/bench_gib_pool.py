@@ -0,0 +1,53 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+"""
+Benchmark the filtering of merged syllable pools in Scrambler._create_gib_pool
+
+usage: PYTHONPATH=. python benchmarks/bench_gib_pool.py [n_syllables]
+"""
+
+import sys
+import time
+import random
+import string
+
+from gibberify import Config, Scrambler
+
+
+def create_gib_pool_old(pool_out, gib_conf):
+    """
+    the old behaviour: one pass and one random.choices call per syllable for each pattern
+    """
+    for pattern in gib_conf['enrich']:
+        pool_out = [syl for syl in pool_out if pattern in syl or random.choices([True, False], [0.5, 0.5])[0]]
+    for pattern in gib_conf['impoverish']:
+        pool_out = [syl for syl in pool_out if pattern not in syl or random.choices([True, False], [0.5, 0.5])[0]]
+    for pattern in gib_conf['remove']:
+        pool_out = [syl for syl in pool_out if pattern not in syl]
+    return pool_out
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    rng = random.Random(0)
+    pool = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(1, 5))) for _ in range(n)]
+
+    print(f'{n} syllables')
+    for gib_lang, gib_conf in Config(default=True)['gib_langs'].items():
+        scr = Scrambler('en', gib_lang, gib_conf)
+        scr.gib_pool_raw = pool
+
+        start = time.perf_counter()
+        old = create_gib_pool_old(pool, gib_conf)
+        before = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = scr._create_gib_pool()
+        after = time.perf_counter() - start
+
+        print(f'{gib_lang}: before {before:.3f}s, after {after:.3f}s ({before / after:.1f}x), '
+              f'kept {len(old)} vs {len(new)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+"""
+Benchmark syllabization speed with and without the shared hyphenator registry and syllable cache
+
+usage: PYTHONPATH=. python benchmarks/bench_syllabize.py [n_words]
+"""
+
+import sys
+import time
+import random
+import string
+from collections import OrderedDict
+import pyphen
+
+from gibberify import utils
+from gibberify.utils.pyphen import HyphenatorRegistry
+
+
+def word_list(n):
+    """
+    use the local English word list if available, otherwise make up some pseudo-words
+    """
+    try:
+        words = list(utils.access_data('words', 'en'))
+    except FileNotFoundError:
+        words = []
+    if len(words) < 1000:
+        rng = random.Random(0)
+        words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 12))) for _ in range(5000)]
+    return [words[i % len(words)] for i in range(n)]
+
+
+def syllabize_uncached(word):
+    """
+    the old behaviour: build a fresh set of hyphenators for every word
+    """
+    syl = word.lower().split('\'')
+    for hyph in [pyphen.Pyphen(lang=lang) for lang in HyphenatorRegistry.default_langs]:
+        syl = [s for w in syl for s in hyph.inserted(w).strip().split('-')]
+    return list(OrderedDict.fromkeys(syl))
+
+
+def bench(func, words):
+    start = time.perf_counter()
+    for w in words:
+        func(w)
+    return len(words) / (time.perf_counter() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    words = word_list(n)
+    # warm up pyphen's own pattern cache so we only measure hyphenator setup
+    utils.syllabize('warmup')
+    before = bench(syllabize_uncached, words)
+    after = bench(lambda w: utils.syllabize(w, cache=False), words)
+    utils.syllable_cache.clear()
+    cached = bench(utils.syllabize, words)
+    print(f'{n} words')
+    print(f'before: {before:10.0f} words/sec')
+    print(f'after:  {after:10.0f} words/sec ({after / before:.1f}x)')
+    print(f'cached: {cached:10.0f} words/sec ({cached / before:.1f}x)')
+    print(f'cache stats: {utils.syllable_cache.stats()}')
+
+
+if __name__ == '__main__':
+    main()
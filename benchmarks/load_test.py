@@ -0,0 +1,82 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+"""
+Load test for the translation server (`gibberify serve`)
+
+usage: python benchmarks/load_test.py [--url http://127.0.0.1:8080] [--clients 8] [--requests 200]
+                                      [--from en] [--to orc] [--batch 1]
+"""
+
+import json
+import time
+import argparse
+import threading
+import http.client
+from urllib.parse import urlparse
+
+SAMPLE = 'Hello there! How are you doing today? I brought some ale for the whole party.'
+
+
+def client(url, n_requests, body, latencies, errors):
+    """
+    send n_requests over a single keep-alive connection, recording the latency of each
+    """
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80)
+    headers = {'Content-Type': 'application/json'}
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        try:
+            conn.request('POST', '/translate', body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(repr(e))
+            conn.close()
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80)
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='load test for the gibberify translation server')
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--clients', type=int, default=8, help='number of concurrent clients')
+    parser.add_argument('--requests', type=int, default=200, help='requests per client')
+    parser.add_argument('--from', dest='lang_in', default='en')
+    parser.add_argument('--to', dest='lang_out', default='orc')
+    parser.add_argument('--batch', type=int, default=1, help='number of texts per request')
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    request = {'from': args.lang_in, 'to': args.lang_out}
+    if args.batch > 1:
+        request['texts'] = [SAMPLE] * args.batch
+    else:
+        request['text'] = SAMPLE
+    body = json.dumps(request)
+
+    latencies = []
+    errors = []
+    threads = [threading.Thread(target=client, args=(url, args.requests, body, latencies, errors))
+               for _ in range(args.clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total = len(latencies)
+    print(f'{total} requests ({args.batch} texts each) from {args.clients} clients in {elapsed:.2f} s')
+    print(f'throughput: {total / elapsed:.0f} requests/s, {total * args.batch / elapsed:.0f} texts/s')
+    for p in (50, 90, 99):
+        print(f'p{p} latency: {latencies[min(total - 1, total * p // 100)] * 1000:.2f} ms')
+    if errors:
+        print(f'{len(errors)} errors, e.g.: {errors[0]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,13 @@
 from .utils import r_lang_codes, syllabize, __version__
 from .config import Config
 from .generate import Syllabizer, Scrambler, build
-from .translate import Translator
+from .translate import Translator, ReactiveTranslator
 from .ui import gui, interactive
 
 __all__ = [
     'Config',
     'build',
     'Translator',
+    'ReactiveTranslator',
     'gui'
 ]
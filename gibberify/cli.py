@@ -6,13 +6,15 @@ Command line interface and argument parsing
 
 import sys
 import argparse
+from pathlib import Path
 
 # local imports
 from . import utils
 from .config import Config
 from .generate import build
 from .translate import Translator
-from .ui import gui, interactive
+from .translate.tokenizer import chunks
+from .ui import gui, interactive, serve
 
 
 def parse():
@@ -44,7 +46,7 @@ def parse():
     trans_opt.add_argument('-m', '--message', type=str, nargs='*',
                            help='text to translate. If a filename is given, the '
                                 'contents of the file will be translated to stdout. '
-                                'If `-` is given, input text is take from stdin. '
+                                'If `-` (or nothing) is given, input text is taken from stdin. '
                                 'Question marks are not supported')
 
     build_opt = parser.add_argument_group('configuration and building options')
@@ -59,13 +61,68 @@ def parse():
     build_opt.add_argument('--rebuild-dicts', dest='rebuild_dicts', action='store_true',
                            help='rebuild translation dictionaries. Use this option '
                                 'after changing dictionary generation settings')
+    build_opt.add_argument('--source', dest='source', type=str, default=None,
+                           help='where to get word data from: the url of a mirror, or a local directory or '
+                                'tarball with the same layout (`dictionaries/<lang>/index.dic`, `words/<lang>.p`, '
+                                '`syllables/<lang>.p`). Defaults to the online repositories; downloads are '
+                                'cached in the data directory, and refreshed by --force-download and --force-syllables')
+    build_opt.add_argument('-j', '--jobs', dest='jobs', type=int, default=None,
+                           help='maximum number of processes used when building. Defaults to the number of CPUs')
+    build_opt.add_argument('--binary', dest='binary', action='store_true',
+                           help='convert generated dictionaries and syllable pools to a compact binary format, '
+                                'which is faster to load and shared in memory between processes')
     build_opt.add_argument('--uninstall', dest='uninstall', action='store_true',
                            help='remove all custom configuration, downloaded and generated data. '
                                 'This is NOT REVERSIBLE')
 
+    commands = parser.add_subparsers(dest='command', title='commands')
+    serve_cmd = commands.add_parser('serve', help='run a local HTTP server that translates json requests. '
+                                                  'Run `gibberify serve -h` for details')
+    serve_cmd.add_argument('--host', type=str, default='127.0.0.1',
+                           help='address to listen on')
+    serve_cmd.add_argument('--port', type=int, default=8080,
+                           help='port to listen on')
+    serve_cmd.add_argument('--preload', action='store_true',
+                           help='load all the dictionaries at startup instead of on first use')
+    serve_cmd.add_argument('--workers', type=int, default=None,
+                           help='number of threads used for reverse translations')
+    serve_cmd.add_argument('--cache', type=int, default=0,
+                           help='maximum number of translation results to keep in memory, to answer repeated '
+                                'requests faster. Disabled by default')
+    serve_cmd.add_argument('--cache-ttl', dest='cache_ttl', type=float, default=None,
+                           help='number of seconds after which cached results expire. By default, they never do')
+
     return parser.parse_args()
 
 
+def translate_message(message, lang_in, lang_out, out=None):
+    """
+    translate the message given on the command line and write the result to out. Files and
+    stdin are translated in chunks as they are read, so memory use does not depend on their size
+    :param message: list of strings, a single filename, or `-` (or nothing) to read from stdin
+    :param out: file-like object to write to. Defaults to stdout
+    """
+    out = out or sys.stdout
+    translator = Translator(lang_in, lang_out)
+    if f'{lang_in}-{lang_out}' not in translator.dicts:
+        sys.exit(f'ERROR: there is no dictionary to translate from "{lang_in}" to "{lang_out}"!')
+
+    if message and message != ['-'] and not (len(message) == 1 and Path(message[0]).is_file()):
+        print(translator(' '.join(message)), file=out)
+        return
+
+    def write(source):
+        for trans in translator.stream(chunks(source)):
+            out.write(trans)
+            out.flush()
+
+    if not message or message == ['-']:
+        write(sys.stdin)
+    else:
+        with open(message[0], 'r', encoding='utf-8') as f:
+            write(f)
+
+
 def run(args):
     """
     takes namespace with named arguments and based on them control the main functions and modules of gibberify
@@ -88,7 +145,13 @@ def run(args):
 
     if any((args.force_download, args.force_syllables, args.rebuild_dicts, args.config)):
         build(conf, from_raw=args.force_download, force_syl_rebuild=args.force_syllables,
-              force_dicts_rebuild=args.rebuild_dicts)
+              force_dicts_rebuild=args.rebuild_dicts, workers=args.jobs,
+              source=args.source)
+        sys.exit()
+
+    if args.binary:
+        converted = utils.convert_all(utils.data)
+        print(f'Converted {len(converted)} files to binary format.')
         sys.exit()
 
     # before running anything, check if data files exist and create them if needed
@@ -100,11 +163,13 @@ def run(args):
             exist.extend([straight.is_file(), reverse.is_file()])
     if not all(exist):
         print('Dictionaries are missing! I will generate the missing data first. It may take a minute!\n')
-        build(conf)
+        build(conf, workers=args.jobs, source=args.source)
 
-    if not graphical and not args.inter:
-        message = args.message[0]
-        print(Translator(args.lang_in, args.lang_out, message))
+    if args.command == 'serve':
+        serve(args.host, args.port, preload=args.preload, workers=args.workers, cache=args.cache,
+              cache_ttl=args.cache_ttl)
+    elif not graphical and not args.inter:
+        translate_message(args.message, args.lang_in, args.lang_out)
     else:
         if graphical:
             gui()
@@ -21,7 +21,10 @@ gib_langs = {
         "pool": ["ru", "de"],       # pool of languages to draw syllables from
         "enrich": ["g", "k", "r"],  # get more of these in the target language
         "impoverish": ["w"],        # get less of these in the target language
-        "remove": []                # get none of these in the target language
+        "remove": [],               # get none of these in the target language
+        "seed": 1,                  # seed for the random generation of the dictionaries (optional,
+                                    # derived from the language code if missing)
+        "mapping": "length"         # how syllables are paired: "random" or "length" (optional, default "random")
     },
     ...
 }
@@ -33,6 +36,7 @@ import texteditor
 
 # local imports
 from .. import utils
+from ..generate import mapping
 
 
 class ConfigError(Exception):
@@ -89,6 +93,18 @@ class Config(dict):
                     checktype(lang, str)
                     checktype(options, dict)
                     for opt_name, opt_value in options.items():
+                        if opt_name == 'seed':
+                            # bool is a subclass of int, but it's clearly a mistake here
+                            if isinstance(opt_value, bool):
+                                raise TypeError(f'{type(opt_value)} should be {int}')
+                            checktype(opt_value, int)
+                            continue
+                        if opt_name == 'mapping':
+                            checktype(opt_value, str)
+                            if opt_value not in mapping.strategies:
+                                raise ConfigError(f'{opt_value} is not a valid mapping. '
+                                                  f'Choose one of: {", ".join(mapping.strategies)}')
+                            continue
                         checktype(opt_value, list)
                         if opt_name == 'pool':
                             if not opt_value:
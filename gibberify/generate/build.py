@@ -4,41 +4,101 @@
 Main entry point of the dictionary generation submodule
 """
 
-from multiprocessing import Process
+import os
+import multiprocessing
 
 # local imports
 from .syllables import Syllabizer
-from .dicts import Scrambler
+from .sources import get_source
+from .dicts import Scrambler, pool_cache
+from .manifest import Manifest, InputHasher, needed_pools, stale_pools, stale_dicts
+from .scheduler import Scheduler
 
 
-def build(conf, from_raw=False, force_syl_rebuild=False, force_dicts_rebuild=False):
+def build(conf, from_raw=False, force_syl_rebuild=False, force_dicts_rebuild=False, workers=None,
+          source=None):
     """
-    generates all data required by gibberify to work
+    generates all data required by gibberify to work. Only the data whose inputs changed
+    since the last build (according to the build manifest) is regenerated
+
+    :param workers: maximum number of processes to use. Defaults to the number of CPUs
+    :param source: where to get raw or pregenerated data from (see `sources.get_source`).
+                   Defaults to the online gibberify repositories
+    :return: dict with the status of each build task
     """
-    # spawn a process for each Syllabizer
-    syl_processes = []
-    for real_lang in conf['real_langs']:
-        s = Syllabizer(real_lang)
-        p = Process(target=s.run, kwargs={'from_raw': from_raw, 'force_rebuild': force_syl_rebuild})
-        syl_processes.append(p)
-
-    # start the processes and wait for all of them to finish before proceding
-    for p in syl_processes:
-        p.start()
-    for p in syl_processes:
-        p.join()
-
-    # spawn a process for each Scrambler
-    scr_processes = []
+    scheduler = Scheduler(workers)
+    # forced rebuilds download everything again
+    source = get_source(source, refresh=from_raw or force_syl_rebuild)
+    manifest = Manifest()
+    hasher = InputHasher()
+
+    # a task for each syllable pool that needs to be generated. Syllable generation can be split between
+    # several processes, so share the available ones between pools
+    syl_tasks = {}
+    syl_langs = stale_pools(conf, force=from_raw or force_syl_rebuild)
+    syl_workers = max(1, (workers or os.cpu_count() or 1) // max(1, len(syl_langs)))
+    for lang in syl_langs:
+        syl_tasks[lang] = f'syllables {lang}'
+        s = Syllabizer(lang, source=source)
+        scheduler.add(syl_tasks[lang], s.run, kwargs={'from_raw': from_raw, 'force_rebuild': force_syl_rebuild,
+                                                      'workers': syl_workers})
+
+    # get all the data at once instead of one language at a time in each task
+    source.prefetch(('dictionaries' if from_raw else 'syllables', lang) for lang in syl_tasks)
+
+    # dictionaries whose pools are untouched can be checked right away, the others only once their pools are ready
+    stale = stale_dicts(conf, manifest, hasher, force=force_dicts_rebuild)
+    digests = {}
+    rehashed = set()
+
+    def check(real_lang, gib_lang):
+        """
+        :return: a function telling whether the dictionary is still stale after its pools were regenerated
+        """
+        gib_conf = conf['gib_langs'][gib_lang]
+
+        def when_ready():
+            # pools were hashed before they were regenerated
+            for lang in {real_lang, *gib_conf['pool']} & set(syl_tasks) - rehashed:
+                hasher.forget(lang)
+                rehashed.add(lang)
+            new_stale = stale_dicts({'real_langs': [real_lang], 'gib_langs': {gib_lang: gib_conf}},
+                                    manifest, hasher, force=force_dicts_rebuild)
+            if not new_stale:
+                return False
+            digests[f'{real_lang}-{gib_lang}'] = new_stale[(real_lang, gib_lang)]
+        return when_ready
+
     for real_lang in conf['real_langs']:
         for gib_lang, gib_conf in conf['gib_langs'].items():
-            # TODO: add ability to detect which dicts exist and avoid redoing them
+            dict_code = f'{real_lang}-{gib_lang}'
+            deps = [syl_tasks[lang] for lang in sorted({real_lang, *gib_conf['pool']}) if lang in syl_tasks]
+            if not deps and (real_lang, gib_lang) not in stale:
+                continue
+            if not deps:
+                digests[dict_code] = stale[(real_lang, gib_lang)]
             s = Scrambler(real_lang, gib_lang, gib_conf)
-            p = Process(target=s.run, kwargs={'force': force_dicts_rebuild})
-            scr_processes.append(p)
-
-    # start the processes and wait for all of them to finish before proceding
-    for p in scr_processes:
-        p.start()
-    for p in scr_processes:
-        p.join()
+            scheduler.add(f'dictionary {dict_code}', s.run, deps=deps, kwargs={'force': True},
+                          when_ready=check(real_lang, gib_lang) if deps else None)
+
+    # when workers are forked, they inherit the pools loaded here instead of each loading their own copy.
+    # They are only needed during the build, so don't keep them in memory afterwards
+    try:
+        if multiprocessing.get_start_method() == 'fork':
+            pool_cache.preload(lang for lang in needed_pools(conf) if lang not in syl_tasks)
+            for gib_conf in conf['gib_langs'].values():
+                if not set(gib_conf['pool']) & set(syl_tasks):
+                    pool_cache.merged(gib_conf['pool'])
+
+        status = scheduler.run()
+    finally:
+        pool_cache.clear()
+
+    # record the inputs of the dictionaries that were built successfully
+    built = [dict_code for dict_code in digests if status.get(f'dictionary {dict_code}') == 'done']
+    for dict_code in built:
+        manifest[dict_code] = digests[dict_code]
+    if built:
+        manifest.write()
+
+    return status
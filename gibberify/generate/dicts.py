@@ -1,14 +1,21 @@
 # Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
 
 import random
+from collections import Counter
 
 # local imports
 from .. import utils
+from ..translate.reverse import TrieMatcher
+from . import mapping
 
 
-class GibDict(dict):
+class GibDict(utils.DerivedData, dict):
     """
     dict class to represent a gibberify translation dictionary
+
+    a GibDict is treated as frozen once built: data derived from the contents (such as the array
+    of keys used for random sampling) is computed on first use and cached. Code that modifies
+    a dictionary after that must call `invalidate`
     """
     def __init__(self, lang_in, lang_out, gib_conf, *args, reverse=False, **kwargs):
         super(GibDict, self).__init__(*args, **kwargs)
@@ -18,6 +25,102 @@ class GibDict(dict):
         self.version = utils.__version__
         self.reverse = reverse
 
+    def __getstate__(self):
+        # derived data can always be recomputed, no need to store it
+        state = self.__dict__.copy()
+        state.pop('_derived', None)
+        return state
+
+    def invalidate(self):
+        """
+        drop all the cached derived data, including the prebuilt trie of reverse dictionaries
+        """
+        self.__dict__.pop('_derived', None)
+        self.__dict__.pop('trie', None)
+
+    def random_syllable(self, rng=None):
+        """
+        pick a random key in constant time, using a precomputed immutable array of keys
+        :param rng: random.Random instance to use (for reproducible results). Defaults to the global one
+        """
+        keys = self.derived('keys', tuple)
+        return (rng or random).choice(keys)
+
+
+class PoolCache:
+    """
+    process-wide, read-only cache of syllable pools, so each pool is loaded only once per process
+    even when it is used by many dictionaries. Pools are reloaded if their file changes.
+
+    Worker processes forked after pools were loaded share them with the parent instead of
+    loading them again (see `preload`)
+    """
+    def __init__(self, store=None):
+        self.store = store or utils.store
+        self._pools = {}
+        self._merged = {}
+
+    def _stamp(self, lang):
+        """
+        :return: something that changes whenever the files of a pool change
+        """
+        path = self.store.path('syllables', lang)
+        stamp = []
+        for file in (path, path.with_suffix(utils.binary.SUFFIX)):
+            try:
+                stamp.append(file.stat().st_mtime_ns)
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def get(self, lang):
+        """
+        :return: the syllable pool of a language
+        """
+        stamp = self._stamp(lang)
+        cached = self._pools.get(lang)
+        if cached is None or cached[0] != stamp:
+            cached = stamp, self.store.load('syllables', lang)
+            self._pools[lang] = cached
+        return cached[1]
+
+    def merged(self, langs):
+        """
+        :return: a sorted tuple with the union of the syllable pools of several languages
+        """
+        key = tuple(langs)
+        stamps = tuple(self._stamp(lang) for lang in key)
+        cached = self._merged.get(key)
+        if cached is None or cached[0] != stamps:
+            pool = set()
+            for lang in key:
+                pool.update(self.get(lang))
+            cached = stamps, tuple(sorted(pool))
+            self._merged[key] = cached
+        return cached[1]
+
+    def preload(self, langs):
+        """
+        load the pools of the given languages in advance, all in one batch (skipping missing ones)
+        """
+        stamps = {}
+        for lang in langs:
+            stamp = self._stamp(lang)
+            cached = self._pools.get(lang)
+            # skip pools without files, and the ones that are already up to date
+            if stamp != (None, None) and (cached is None or cached[0] != stamp):
+                stamps[lang] = stamp
+        for lang, pool in self.store.load_many('syllables', stamps).items():
+            self._pools[lang] = stamps[lang], pool
+
+    def clear(self):
+        self._pools.clear()
+        self._merged.clear()
+
+
+# the cache used by all the Scramblers in this process
+pool_cache = PoolCache()
+
 
 class Scrambler:
     """
@@ -26,10 +129,16 @@ class Scrambler:
     based on a given configuration, generates a straight and reverse
     dictionary for the given combination of languages
     """
+    # chance for a syllable to survive each enrich/impoverish pattern
+    keep_probability = 0.5
+
     def __init__(self, real_lang, gib_lang, gib_conf):
         self.real_lang = real_lang
         self.gib_lang = gib_lang
         self.gib_conf = gib_conf
+        # a private generator, so the same configuration always results in the same dictionaries.
+        # Each real language gets its own sequence, and seeding with a string is stable across runs, unlike hash()
+        self.rng = random.Random(f"{gib_conf.get('seed', gib_lang)}-{real_lang}")
         self.real_pool = None
         self.gib_pool_raw = None
         self.gib_pool = None
@@ -42,7 +151,7 @@ class Scrambler:
         :return: True if the same dictionary already exists, False otherwise
         """
         try:
-            old = utils.access_data('dicts', self.real_lang, self.gib_lang)
+            old = utils.store.load('dicts', self.real_lang, self.gib_lang)
         except FileNotFoundError:
             return False
         if old.conf != self.gib_conf:
@@ -51,47 +160,57 @@ class Scrambler:
 
     def _load_real_pool(self):
         """
-        loads all the syllables from the required real language
+        loads all the syllables from the required real language, sorted so the mapping is reproducible
         """
-        return utils.access_data('syllables', self.real_lang)
+        return sorted(pool_cache.get(self.real_lang))
 
     def _load_gib_pool_raw(self):
         """
         loads all the syllables needed for the gibberish language from a list of real languages
         """
-        pool = set()
-        for lang in self.gib_conf['pool']:
-            pool_part = utils.access_data('syllables', lang)
-            pool.update(pool_part)
+        return list(pool_cache.merged(self.gib_conf['pool']))
 
-        return list(pool)
+    def _filters(self):
+        """
+        translates the configuration into per-pattern keep probabilities. Patterns given more than once
+        are combined, as if the syllables were filtered once for each time they appear
+
+        :return: list of (pattern, keep probability if a syllable contains it, keep probability if not)
+        """
+        filters = []
+        # get rid of part of the syllables NOT containing enriched patterns
+        for pattern, count in Counter(self.gib_conf['enrich']).items():
+            filters.append((pattern, 1.0, self.keep_probability ** count))
+        # get rid of part of the syllables containing impoverished patterns
+        for pattern, count in Counter(self.gib_conf['impoverish']).items():
+            filters.append((pattern, self.keep_probability ** count, 1.0))
+        # get rid of ALL the syllables containing forbidden patterns
+        for pattern in set(self.gib_conf['remove']):
+            filters.append((pattern, 0.0, 1.0))
+        return filters
 
     def _create_gib_pool(self):
         """
         creates a customized pool of syllables to be used by the gibberish language by
         applying several options defined in the provided configuration
-        """
-        pool_out = self.gib_pool_raw
 
-        # get rid of part of the syllables NOT containing enriched patterns
-        for pattern in self.gib_conf['enrich']:
-            # get rid of 50% of syllables containing pattern
-            temp_pool = [syl for syl in pool_out if pattern in syl or random.choices([True, False], [0.5, 0.5])[0]]
-            pool_out = temp_pool
+        all the patterns are checked in a single pass, and each syllable is kept with the product
+        of the probabilities of all the filters, using at most one random draw
+        """
+        filters = self._filters()
+        draw = self.rng.random
 
-        # get rid of part of the syllables containing impoverished patterns
-        for pattern in self.gib_conf['impoverish']:
-            # get rid of 50% of syllables containing pattern
-            temp_pool = [syl for syl in pool_out if pattern not in syl or random.choices([True, False], [0.5, 0.5])[0]]
-            pool_out = temp_pool
+        pool_out = []
+        for syl in self.gib_pool_raw:
+            keep = 1.0
+            for pattern, keep_in, keep_out in filters:
+                keep *= keep_in if pattern in syl else keep_out
+                if not keep:
+                    break
+            if keep == 1.0 or (keep and draw() < keep):
+                pool_out.append(syl)
 
-        # get rid of ALL the syllables containing forbidden patterns
-        for pattern in self.gib_conf['remove']:
-            # get rid of all the syllables containing pattern
-            temp_pool = [syl for syl in pool_out if pattern not in syl]
-            pool_out = temp_pool
-
-        return list(pool_out)
+        return pool_out
 
     def _make_straight(self):
         """
@@ -103,19 +222,12 @@ class Scrambler:
         print(f'Creating translation dictionary from {utils.r_lang_codes[self.real_lang]} to {self.gib_lang}...')
         trans_dict = GibDict(self.real_lang, self.gib_lang, self.gib_conf)
 
-        # TODO: use shorter syllables more often, like in normal languages
-        # make sure we do enough times to map to all the input syllables (should not be a problem, but you never know)
-        ratio = len(self.real_pool) // len(self.gib_pool)
-        tmp_gib_pool = self.gib_pool
-        final_gib_pool = tmp_gib_pool
-        for _ in range(ratio):
-            random.shuffle(tmp_gib_pool)
-            final_gib_pool.extend(tmp_gib_pool)
-
-        # do the actual mapping
-        # TODO: add some customization to mapping (length?...)
-        for syl_real in self.real_pool:
-            syl_gib = final_gib_pool.pop()
+        if not self.gib_pool:
+            raise ValueError(f'no syllables left for {self.gib_lang}: its configuration removes all of them')
+
+        # do the actual mapping, with the strategy chosen in the configuration
+        strategy = mapping.strategies[self.gib_conf.get('mapping', mapping.default)]
+        for syl_real, syl_gib in strategy(self.real_pool, self.gib_pool, self.rng):
             trans_dict[syl_real] = syl_gib
 
         return trans_dict
@@ -123,19 +235,15 @@ class Scrambler:
     def _make_reverse(self):
         """
         takes an existing translation dictionary from real to gibberish and reverses it
+
+        the prefix tree used for reverse translation is built here once and saved with the dictionary
+        (as its `trie` attribute), so translators can use it right after loading
         """
         print(f'Creating translation dictionary from {self.gib_lang} to {utils.r_lang_codes[self.real_lang]}...')
         rev = GibDict(self.gib_lang, self.real_lang, self.gib_conf, reverse=True)
-
-        all_reverse = {k: v for v, k in self.dict_straight.items()}
-
-        # sort by length, needed for reverse translation
-        # TODO: not sure this is really true. Need more testing.
-        for k, v in all_reverse.items():
-            ln = len(k)
-            if ln not in rev.keys():
-                rev[ln] = {}
-            rev[ln][k] = v
+        rev.update((v, k) for k, v in self.dict_straight.items())
+        rev.invalidate()
+        rev.trie = TrieMatcher.build(rev)
 
         return rev
 
@@ -143,14 +251,14 @@ class Scrambler:
         """
         writes to file the generated data
         """
-        utils.access_data('dicts', self.real_lang, self.gib_lang, write_data=self.dict_straight)
-        utils.access_data('dicts', self.gib_lang, self.real_lang, write_data=self.dict_reverse)
+        utils.store.save('dicts', self.dict_straight, self.real_lang, self.gib_lang)
+        utils.store.save('dicts', self.dict_reverse, self.gib_lang, self.real_lang)
 
     def run(self, force=False):
         """
         main class method, runs all the other methods and saves dicts to file
         """
-        if self._exists() and not force:
+        if not force and self._exists():
             return
         self.real_pool = self._load_real_pool()
         self.gib_pool_raw = self._load_gib_pool_raw()
@@ -0,0 +1,112 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+"""
+Build manifest, used to find out which data needs to be regenerated without loading it
+
+For each dictionary, the manifest records a hash of everything it was generated from:
+the syllable pool files, the configuration of the gibberish language and the version of gibberify
+"""
+
+import json
+import hashlib
+from pathlib import Path
+
+# local imports
+from .. import utils
+
+
+class Manifest(dict):
+    """
+    dict mapping each straight dictionary code (`reallang-giblang`) to the hash of its inputs
+    """
+    def __init__(self, *args, path=None, **kwargs):
+        super(Manifest, self).__init__(*args, **kwargs)
+        self.path = Path(path) if path is not None else utils.data/'manifest.json'
+        if not self and self.path.is_file():
+            with open(self.path, 'r') as f:
+                self.update(json.load(f))
+
+    def write(self):
+        """
+        writes the manifest to file
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w+') as f:
+            json.dump(self, f, indent=4, sort_keys=True)
+
+
+class InputHasher:
+    """
+    computes hashes of the inputs of a build. Each syllable pool file is hashed only once
+    """
+    def __init__(self, store=None):
+        self.store = store or utils.store
+        self._files = {}
+
+    def pool(self, lang):
+        """
+        :return: hash of the syllable pool file of a language, or None if it does not exist
+        """
+        if lang not in self._files:
+            path = self.store.path('syllables', lang)
+            try:
+                self._files[lang] = hashlib.sha256(path.read_bytes()).hexdigest()
+            except FileNotFoundError:
+                self._files[lang] = None
+        return self._files[lang]
+
+    def forget(self, lang):
+        """
+        discard the hash of a pool (e.g: after it was regenerated)
+        """
+        self._files.pop(lang, None)
+
+    def dictionary(self, real_lang, gib_conf):
+        """
+        :return: hash of all the inputs of a dictionary
+        """
+        inputs = {
+            'version': utils.__version__,
+            'conf': gib_conf,
+            'real_pool': self.pool(real_lang),
+            'gib_pool': [self.pool(lang) for lang in gib_conf['pool']],
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def needed_pools(conf):
+    """
+    :return: sorted list of all the languages whose syllable pool is used by the configuration
+    """
+    langs = set(conf['real_langs'])
+    for gib_conf in conf['gib_langs'].values():
+        langs.update(gib_conf['pool'])
+    return sorted(langs)
+
+
+def stale_pools(conf, force=False, store=None):
+    """
+    :param force: consider all the pools stale
+    :return: list of languages whose syllable pool needs to be generated
+    """
+    store = store or utils.store
+    return [lang for lang in needed_pools(conf) if force or not store.path('syllables', lang).is_file()]
+
+
+def stale_dicts(conf, manifest, hasher, force=False):
+    """
+    compare the current inputs of each dictionary with the ones recorded in the manifest
+
+    :param force: consider all the dictionaries stale
+    :return: dict with (real_lang, gib_lang) tuples of the dictionaries to rebuild as keys,
+             and the hash of their inputs as values
+    """
+    stale = {}
+    for real_lang in conf['real_langs']:
+        for gib_lang, gib_conf in conf['gib_langs'].items():
+            digest = hasher.dictionary(real_lang, gib_conf)
+            exist = all(hasher.store.path('dicts', *langs).is_file()
+                        for langs in ((real_lang, gib_lang), (gib_lang, real_lang)))
+            if force or not exist or manifest.get(f'{real_lang}-{gib_lang}') != digest:
+                stale[(real_lang, gib_lang)] = digest
+    return stale
@@ -0,0 +1,47 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+"""
+Strategies used to pair the syllables of a real language with gibberish syllables
+
+each strategy takes the real pool, the gibberish pool and a random.Random instance,
+and yields (real syllable, gibberish syllable) pairs, one for each real syllable
+"""
+
+
+def random_mapping(real_pool, gib_pool, rng):
+    """
+    pairs syllables uniformly at random. Goes through random permutations of the gibberish pool,
+    one after the other, so every gibberish syllable is used about as often as the others
+    """
+    n_gib = len(gib_pool)
+    for i, syl_real in enumerate(real_pool):
+        if i % n_gib == 0:
+            order = list(range(n_gib))
+            rng.shuffle(order)
+        yield syl_real, gib_pool[order[i % n_gib]]
+
+
+def length_mapping(real_pool, gib_pool, rng):
+    """
+    pairs syllables by length rank: both pools are sorted by length (in random order within the same length)
+    and each real syllable gets the gibberish syllable at the same relative position. Short syllables are then
+    translated into short ones, and translations stay about as long as the original text.
+
+    There is no frequency data for syllables, so length rank stands in for frequency rank
+    (short syllables are the most common ones in natural languages)
+    """
+    real = sorted(real_pool, key=lambda syl: (len(syl), rng.random()))
+    gib = sorted(gib_pool, key=lambda syl: (len(syl), rng.random()))
+    n_real = len(real)
+    n_gib = len(gib)
+    for i, syl_real in enumerate(real):
+        yield syl_real, gib[i * n_gib // n_real]
+
+
+strategies = {
+    'random': random_mapping,
+    'length': length_mapping,
+}
+
+# used when the configuration of a gibberish language does not choose one
+default = 'random'
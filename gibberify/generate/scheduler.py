@@ -0,0 +1,115 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+"""
+Simple dependency-aware scheduler running build tasks on a bounded pool of processes
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+
+def _timed(target, kwargs):
+    """
+    run target in a worker process
+    :return: time taken, in seconds
+    """
+    start = time.perf_counter()
+    target(**kwargs)
+    return time.perf_counter() - start
+
+
+class Task:
+    """
+    a unit of work for the Scheduler
+    """
+    def __init__(self, name, target, deps=(), kwargs=None, when_ready=None):
+        """
+        :param name: unique name of the task
+        :param target: picklable callable to run in a worker process
+        :param deps: names of the tasks that must complete successfully before this one can start
+        :param kwargs: keyword arguments for target
+        :param when_ready: optional callable run in the main process once all the dependencies are
+                           done. If it returns False, the task is skipped
+        """
+        self.name = name
+        self.target = target
+        self.deps = tuple(deps)
+        self.kwargs = kwargs or {}
+        self.when_ready = when_ready
+
+
+class Scheduler:
+    """
+    runs tasks on a pool of worker processes, starting each of them as soon as its dependencies are done
+    """
+    def __init__(self, workers=None, verbose=True):
+        """
+        :param workers: maximum number of processes running at the same time. Defaults to the number of CPUs
+        :param verbose: print progress and timing of each task
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.verbose = verbose
+        self.tasks = {}
+        # status of each task (done, up to date, failed or skipped) and time it took to run
+        self.status = {}
+        self.times = {}
+
+    def add(self, name, target, deps=(), kwargs=None, when_ready=None):
+        """
+        add a task to the schedule (see Task). Dependencies must be added first
+        """
+        if name in self.tasks:
+            raise ValueError(f'task "{name}" already exists')
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f'task "{name}" depends on unknown task "{dep}"')
+        self.tasks[name] = Task(name, target, deps, kwargs, when_ready)
+
+    def _report(self, name, status, elapsed=None, reason=''):
+        self.status[name] = status
+        if elapsed is not None:
+            self.times[name] = elapsed
+        if self.verbose:
+            timing = f' in {elapsed:.2f}s' if elapsed is not None else ''
+            reason = f' ({reason})' if reason else ''
+            print(f'[{len(self.status)}/{len(self.tasks)}] {name}: {status}{timing}{reason}')
+
+    def _submit_ready(self, pending, running, executor):
+        """
+        start all the pending tasks whose dependencies are done, or skip them if any failed
+        """
+        progress = True
+        while progress:
+            progress = False
+            for name, task in list(pending.items()):
+                if not all(dep in self.status for dep in task.deps):
+                    continue
+                del pending[name]
+                progress = True
+                if any(self.status[dep] not in ('done', 'up to date') for dep in task.deps):
+                    self._report(name, 'skipped', reason='a dependency failed')
+                elif task.when_ready is not None and task.when_ready() is False:
+                    self._report(name, 'up to date')
+                else:
+                    running[executor.submit(_timed, task.target, task.kwargs)] = name
+
+    def run(self):
+        """
+        run all the tasks and wait for them to finish
+        :return: dict with the status of each task
+        """
+        pending = dict(self.tasks)
+        running = {}
+        with ProcessPoolExecutor(self.workers) as executor:
+            self._submit_ready(pending, running, executor)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self._report(name, 'done', future.result())
+                    except Exception as e:
+                        self._report(name, 'failed', reason=repr(e))
+                self._submit_ready(pending, running, executor)
+        return self.status
@@ -0,0 +1,211 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+"""
+Data sources used by the Syllabizer to obtain raw dictionaries, word lists and syllable pools
+"""
+
+import os
+import shutil
+import tarfile
+import tempfile
+from pathlib import Path
+from urllib.request import urlopen
+from concurrent.futures import ThreadPoolExecutor
+import certifi
+
+# local imports
+from .. import utils
+
+
+# where each kind of data is found, relative to the root of a source
+layout = {
+    'dictionaries': 'dictionaries/{lang}/index.dic',
+    'words': 'words/{lang}.p',
+    'syllables': 'syllables/{lang}.p',
+}
+# top level directories of a source
+_top_dirs = sorted({path.split('/')[0] for path in layout.values()})
+
+
+class Source:
+    """
+    base class for data sources. Subclasses implement `open`
+    """
+    @staticmethod
+    def path(kind, lang):
+        """
+        :return: path of the requested data, relative to the root of the source
+        """
+        return layout[kind].format(lang=lang)
+
+    def open(self, kind, lang):
+        """
+        :param kind: one of 'dictionaries', 'words' or 'syllables'
+        :return: binary file-object with the requested data
+        """
+        raise NotImplementedError
+
+    def prefetch(self, items):
+        """
+        get ready to serve the given (kind, lang) items. Does nothing by default
+        """
+
+
+class LocalSource(Source):
+    """
+    reads data from a local directory or tarball with the same layout as the online repositories:
+    `dictionaries/<lang>/index.dic`, `words/<lang>.p` and `syllables/<lang>.p`.
+    Tarballs may have everything inside a single top level directory (like github archives).
+    They are extracted only once, to a cache directory, and a new copy is made if the archive changes
+    """
+    def __init__(self, root, cache_dir=None):
+        """
+        :param cache_dir: where to extract tarballs. Defaults to `downloads` in the data directory
+        """
+        self.root = Path(root)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else utils.data/'downloads'
+
+    def __repr__(self):
+        return f'{type(self).__name__}({str(self.root)!r})'
+
+    def _extracted(self):
+        """
+        :return: directory with the extracted contents of the tarball, extracting it first if needed
+        """
+        stat = self.root.stat()
+        target = self.cache_dir/'extracted'/f'{self.root.name}-{stat.st_size}-{stat.st_mtime_ns}'
+        if target.is_dir():
+            return target
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # extract to a temporary directory first, so concurrent builds never read half-extracted data
+        tmp = Path(tempfile.mkdtemp(dir=target.parent))
+        try:
+            with tarfile.open(self.root) as tar:
+                for member in tar:
+                    if not member.isfile():
+                        continue
+                    # strip any leading directory, and skip anything not in the layout
+                    name = f'/{member.name}'
+                    starts = [name.find(f'/{top}/') for top in _top_dirs if f'/{top}/' in name]
+                    if not starts:
+                        continue
+                    rel = Path(name[min(starts) + 1:])
+                    if '..' in rel.parts:
+                        continue
+                    (tmp/rel).parent.mkdir(parents=True, exist_ok=True)
+                    with tar.extractfile(member) as src, open(tmp/rel, 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+            os.rename(tmp, target)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            # another process may have extracted it in the meantime
+            if not target.is_dir():
+                raise
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return target
+
+    def open(self, kind, lang):
+        root = self.root if self.root.is_dir() else self._extracted()
+        return open(root/self.path(kind, lang), 'rb')
+
+    def prefetch(self, items):
+        """
+        extract tarballs in advance, so worker processes can use them right away
+        """
+        if not self.root.is_dir():
+            self._extracted()
+
+
+class HTTPSource(Source):
+    """
+    downloads data from the gibberify repositories on github, or from a mirror with the same layout as LocalSource.
+    Downloaded files are kept in an on-disk cache, so they are downloaded only once (unless refreshing)
+    """
+    baseurls = {
+        'dictionaries': 'https://raw.githubusercontent.com/brisvag/dictionaries/master',
+        'words': 'https://raw.githubusercontent.com/brisvag/gibberify-data/master',
+        'syllables': 'https://raw.githubusercontent.com/brisvag/gibberify-data/master',
+    }
+
+    def __init__(self, mirror=None, cache_dir=None, cache=True, refresh=False, workers=8):
+        """
+        :param mirror: base url used instead of the default ones for all kinds of data
+        :param cache_dir: where to keep downloaded files. Defaults to `downloads` in the data directory
+        :param cache: if False, always download data and don't write it to disk
+        :param refresh: if True, download everything again (once) even if it's already cached
+        :param workers: number of concurrent downloads when prefetching
+        """
+        self.mirror = mirror.rstrip('/') if mirror else None
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else utils.data/'downloads'
+        self.cache = cache
+        self.refresh = refresh
+        self.workers = workers
+        # items already downloaded again when refreshing. Sent to worker processes together with the source
+        self.refreshed = set()
+
+    def __repr__(self):
+        return f'{type(self).__name__}(mirror={self.mirror!r})'
+
+    def url(self, kind, lang):
+        baseurl = self.mirror or self.baseurls[kind]
+        return f'{baseurl}/{self.path(kind, lang)}'
+
+    def _download(self, kind, lang):
+        # certifi is needed for mac, otherwise it complains about missing ssl certificates
+        return urlopen(self.url(kind, lang), cafile=certifi.where())
+
+    def fetch(self, kind, lang):
+        """
+        downloads the requested data to the cache, unless it's already there
+        :return: path of the cached file
+        """
+        cached = self.cache_dir/self.path(kind, lang)
+        stale = self.refresh and (kind, lang) not in self.refreshed
+        if stale or not cached.is_file():
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first, so concurrent builds never read half-downloaded data
+            fd, tmp = tempfile.mkstemp(dir=cached.parent)
+            try:
+                with os.fdopen(fd, 'wb') as f, self._download(kind, lang) as response:
+                    shutil.copyfileobj(response, f)
+                os.replace(tmp, cached)
+            except BaseException:
+                os.remove(tmp)
+                raise
+            self.refreshed.add((kind, lang))
+        return cached
+
+    def open(self, kind, lang):
+        if not self.cache:
+            return self._download(kind, lang)
+        return open(self.fetch(kind, lang), 'rb')
+
+    def prefetch(self, items):
+        """
+        downloads all the given (kind, lang) items concurrently. Failures are ignored here
+        and will be raised again when the data is actually opened
+        """
+        if not self.cache:
+            return
+        with ThreadPoolExecutor(self.workers) as executor:
+            futures = [executor.submit(self.fetch, kind, lang) for kind, lang in items]
+        for future in futures:
+            future.exception()
+
+
+def get_source(spec=None, refresh=False):
+    """
+    :param spec: url of a mirror, path to a local directory or tarball, or None for the default online source
+    :param refresh: make online sources download data again instead of using their cache
+    :return: the corresponding Source
+    """
+    if spec is None:
+        return HTTPSource(refresh=refresh)
+    if isinstance(spec, Source):
+        return spec
+    if str(spec).startswith(('http://', 'https://')):
+        return HTTPSource(mirror=spec, refresh=refresh)
+    return LocalSource(spec)
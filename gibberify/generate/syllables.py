@@ -1,12 +1,15 @@
 # Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
 
-from urllib.request import urlopen
+import os
+import re
+from multiprocessing import current_process
+from concurrent.futures import ProcessPoolExecutor
 from transliterate import translit, get_available_language_codes
 import pickle
-import certifi
 
 # local imports
 from .. import utils
+from .sources import get_source
 
 
 class GibPool(list):
@@ -19,115 +22,144 @@ class GibPool(list):
         self.version = utils.__version__
 
 
+# characters which make a line not worth keeping
+_discard_re = re.compile('[⁰¹²³⁴⁵⁶⁷⁸⁹]')
+
+
+def parse_hunspell(lines, lang):
+    """
+    parses a dictionary in hunspell format (utf-8 version), one line at a time
+
+    :param lines: iterable of encoded lines, without the header (e.g. a file opened in binary mode)
+    :param lang: language of the dictionary, used to decide whether it needs to be transliterated
+    :return: generator of valid words. Duplicates are not removed
+    """
+    # decide once whether to transliterate, instead of for every line
+    transliterate = lang in get_available_language_codes()
+    for line in lines:
+        # decode, remove comments and strip line from unwanted stuff
+        word = line.decode('utf-8').partition('/')[0].strip()
+        if not word:
+            continue
+        # transliterate line if needed
+        if transliterate:
+            word = translit(word, lang, reversed=True)
+        # discard lines containing superscript/subscript
+        if _discard_re.search(word):
+            continue
+        # discard lines containing non-alpha characters and with non-normal capitalization (acronyms...)
+        if not word.isalpha() or (len(word) > 1 and not word[1:].islower()):
+            continue
+        yield word
+
+
+def syllabize_words(words):
+    """
+    syllabize a list of words (used by worker processes, which build their own hyphenators once)
+    :return: set of all the syllables found
+    """
+    syllables = set()
+    for word in words:
+        # let's clean up once more just to be sure
+        word = word.strip()
+        syllables.update(utils.syllabize(word))
+    return syllables
+
+
 class Syllabizer:
     """
     Syllabizer class. Takes care of download, processing and generation
     of all the data needed to make custom dictionaries
     """
-    def __init__(self, lang):
+    def __init__(self, lang, source=None):
+        """
+        :param source: where to get data from. Either a Source, or anything accepted by `sources.get_source`.
+                       Defaults to the online gibberify repositories
+        """
         self.lang = lang
+        self.source = get_source(source)
         self.raw = None
         self.words = None
         self.syllables = None
 
     def _download_raw(self):
         """
-        downloads a dictionary file from: https://github.com/brisvag/dictionaries
-        """
-        baseurl = 'https://raw.githubusercontent.com/brisvag/dictionaries/master/dictionaries/'
+        gets a dictionary file from the source (by default: https://github.com/brisvag/dictionaries)
 
-        print(f'Downloading raw data for {utils.r_lang_codes[self.lang]}...')
-        # certifi is needed for mac, otherwise it complains about missing ssl certificates
-        file = urlopen(f"{baseurl}/{self.lang}/index.dic", cafile=certifi.where())
+        :return: binary file-object positioned after the header line
+        """
+        print(f'Fetching raw data for {utils.r_lang_codes[self.lang]}...')
+        file = self.source.open('dictionaries', self.lang)
 
-        lines = file.readlines()[1:]
-        return lines
+        # first line is just the number of words
+        file.readline()
+        return file
 
     def _download_words(self):
         """
-        downloads pregenerated word lists from: https://github.com/brisvag/gibberify-data
+        gets pregenerated word lists from the source (by default: https://github.com/brisvag/gibberify-data)
         """
-        baseurl = 'https://raw.githubusercontent.com/brisvag/gibberify-data/master/words/'
-
-        print(f'Downloading pregenerated words for {utils.r_lang_codes[self.lang]}...')
-        # certifi is needed for mac, otherwise it complains about missing ssl certificates
-        file = urlopen(f"{baseurl}/{self.lang}.p", cafile=certifi.where())
-
-        return pickle.load(file)
+        print(f'Fetching pregenerated words for {utils.r_lang_codes[self.lang]}...')
+        with self.source.open('words', self.lang) as file:
+            return pickle.load(file)
 
     def _download_syllables(self):
         """
-        downloads pregenerated syllables from: https://github.com/brisvag/gibberify-data
+        gets pregenerated syllables from the source (by default: https://github.com/brisvag/gibberify-data)
         """
-        baseurl = 'https://raw.githubusercontent.com/brisvag/gibberify-data/master/syllables/'
-
-        print(f'Downloading pregenerated syllables for {utils.r_lang_codes[self.lang]}...')
-        # certifi is needed for mac, otherwise it complains about missing ssl certificates
-        file = urlopen(f"{baseurl}/{self.lang}.p", cafile=certifi.where())
-
-        return pickle.load(file)
+        print(f'Fetching pregenerated syllables for {utils.r_lang_codes[self.lang]}...')
+        with self.source.open('syllables', self.lang) as file:
+            return pickle.load(file)
 
     def _load_words(self):
         """
         loads word list from file
         """
-        return utils.access_data('words', self.lang)
+        return utils.store.load('words', self.lang)
 
     def _load_syllables(self):
         """
         loads syllable list from file
         """
-        return utils.access_data('syllables', self.lang)
+        return utils.store.load('syllables', self.lang)
 
     def _make_words(self):
         """
-        parses a dictionary file-object in hunspell format (utf-8 version)
+        parses the raw dictionary file-object in hunspell format (utf-8 version)
 
         :return: a unique list of words
         """
-        words = set()
+        return GibPool(self.lang, sorted(set(parse_hunspell(self.raw, self.lang))))
 
-        lines = self.raw
-        for line in lines:
-            # decode and remove comments
-            line = line.decode('utf-8').partition('/')[0]
-            # strip line from unwanted stuff
-            line = line.strip()
-            # transliterate line if needed
-            if self.lang in get_available_language_codes():
-                line = translit(line, self.lang, reversed=True)
-            # discard lines containing superscript/subscript
-            if any(x in line for x in '⁰¹²³⁴⁵⁶⁷⁸⁹'):
-                continue
-            # discard lines containing non-alpha characters and with non-normal capitalization (acronyms...)
-            if not line.isalpha() or (len(line) > 1 and not line[1:].islower()):
-                continue
-            words.add(line)
-
-        words.discard('')
-
-        return GibPool(self.lang, words)
-
-    def _make_syllables(self, from_file=False):
+    def _make_syllables(self, from_file=False, workers=None, chunksize=10000):
         """
         generates a pool of syllables for a given language starting from a word list
         :param from_file: load words from file instead of downloading them
+        :param workers: number of processes to split the work between. Defaults to the number of CPUs
+        :param chunksize: number of words syllabized at a time by each process
         """
-        syllables = set()
-
         print(f'Generating syllables for {utils.r_lang_codes[self.lang]}...')
 
         # open words file and syllabize all of them
         if from_file:
-            words = utils.access_data('words', self.lang)
+            words = utils.store.load('words', self.lang)
         else:
             words = self.words
-        for word in words:
-            # let's clean up once more just to be sure
-            word = word.strip()
-            syllables.update(set(utils.syllabize(word)))
+        words = list(words)
+
+        workers = workers or os.cpu_count() or 1
+        # daemonic processes (used by some pools) are not allowed to have children
+        if workers > 1 and len(words) > chunksize and not current_process().daemon:
+            chunks = [words[i:i + chunksize] for i in range(0, len(words), chunksize)]
+            syllables = set()
+            with ProcessPoolExecutor(min(workers, len(chunks))) as executor:
+                for part in executor.map(syllabize_words, chunks):
+                    syllables.update(part)
+        else:
+            syllables = syllabize_words(words)
 
-        return GibPool(self.lang, syllables)
+        # sorted, so the same words always give the same file
+        return GibPool(self.lang, sorted(syllables))
 
     def _save(self, words=False, syllables=True):
         """
@@ -135,30 +167,31 @@ class Syllabizer:
         type of data when saving to file
         """
         if words:
-            utils.access_data('words', self.lang, write_data=self.words)
+            utils.store.save('words', self.words, self.lang)
         if syllables:
-            utils.access_data('syllables', self.lang, write_data=self.syllables)
+            utils.store.save('syllables', self.syllables, self.lang)
 
-    def run(self, from_raw=False, download_words=False, from_words=False, force_rebuild=False):
+    def run(self, from_raw=False, download_words=False, from_words=False, force_rebuild=False, workers=None):
         """
         automatically downloads and parses data, then generates syllable pools
         :param from_raw: if True, download raw dictionaries and process everything locally
         :param download_words: if True, download words instead of using the local files
         :param from_words: if True, download pre-generated word list and generate syllables from them
         :param force_rebuild: if True, re-generate or re-download syllables even if already present
+        :param workers: number of processes used to generate syllables. Defaults to the number of CPUs
         """
         file = utils.data/'syllables'/f'{self.lang}.p'
         if any((not file.is_file(), from_raw, download_words, from_words, force_rebuild)):
             if from_raw:
-                self.raw = self._download_raw()
-                self.words = self._make_words()
-                self.syllables = self._make_syllables()
+                with self._download_raw() as self.raw:
+                    self.words = self._make_words()
+                self.syllables = self._make_syllables(workers=workers)
             elif download_words:
                 self.words = self._load_words()
-                self.syllables = self._make_syllables()
+                self.syllables = self._make_syllables(workers=workers)
             elif from_words:
                 self.words = self._download_words()
-                self.syllables = self._make_syllables()
+                self.syllables = self._make_syllables(workers=workers)
             else:
                 self.syllables = self._download_syllables()
 
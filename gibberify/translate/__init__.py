@@ -1,3 +1,3 @@
 # Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
 
-from .translator import Translator
+from .translator import Translator, ReactiveTranslator, DictLoader, translate, gibberify, degibberify
@@ -0,0 +1,162 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+"""
+Reverse translation engines, used to turn gibberish back into something resembling the original text
+
+All the engines are built from a reverse GibDict and expose a `translate(text)` method
+that replaces gibberish syllables with their real counterparts, leaving anything else as is
+"""
+
+import re
+
+# local imports
+from ..utils.binary import iter_syllables
+
+
+class LoopMatcher:
+    """
+    original engine: searches every syllable in the text, from the longest to the shortest,
+    and replaces matches with placeholders so they cannot be matched again
+    """
+    def __init__(self, rev_dict):
+        self.buckets = {}
+        for syl, mapping in iter_syllables(rev_dict):
+            self.buckets.setdefault(len(syl), {})[syl] = mapping
+
+    def translate(self, text):
+        # get list of syllable lengths
+        lns = list(self.buckets.keys())
+        lns.sort(reverse=True)
+
+        # save two versions of the text which need to be processed in parallel
+        trans = text
+        trans_tmp = trans
+        # start from longest syllables
+        for ln in lns:
+            for syl, mapping in self.buckets[ln].items():
+                # if syllable is found in the text
+                for match in re.finditer(re.escape(syl), trans_tmp):
+                    # save start and end index of the matched syllable
+                    start, end = match.span()
+                    # The following shenanigans are needed because we need to make sure already replaced
+                    # syllables are not matched again to a new mapping (hence the placeholders)
+                    # this needs to be done with len(mapping) because matched syllables and their mappings are NOT
+                    # the same length!
+                    # replace matched syllable with placeholders in temp translation,
+                    trans_tmp = ''.join([c for c in trans_tmp[:start]] +
+                                        ['�'] * len(mapping) +
+                                        [x for x in trans_tmp[end:]])
+                    # replace in real translation with ACTUAL mapping
+                    trans = ''.join([c for c in trans[:start]] +
+                                    [c for c in mapping] +
+                                    [x for x in trans[end:]])
+
+        return trans
+
+
+class RegexMatcher:
+    """
+    same strategy as LoopMatcher, but all the syllables of the same length are compiled once
+    into a single alternation, so each length bucket needs just one pass over the text
+    """
+    # replaces already translated characters. It is not a word character, so no syllable can match it
+    PLACEHOLDER = '\0'
+
+    def __init__(self, rev_dict):
+        buckets = {}
+        for syl, mapping in iter_syllables(rev_dict):
+            buckets.setdefault(len(syl), {})[syl] = mapping
+        # start from longest syllables
+        self.buckets = [(re.compile('|'.join(re.escape(syl) for syl in bucket)), bucket)
+                        for ln, bucket in sorted(buckets.items(), reverse=True)]
+
+    def translate(self, text):
+        # one cell per input character: matched syllables put their mapping in the first cell
+        # and empty the others, so positions never shift while we go on matching
+        trans = list(text)
+
+        for pattern, bucket in self.buckets:
+            def replace(match):
+                start, end = match.span()
+                trans[start:end] = [bucket[match.group()]] + [''] * (end - start - 1)
+                return self.PLACEHOLDER * (end - start)
+            text = pattern.sub(replace, text)
+
+        return ''.join(trans)
+
+
+class TrieMatcher:
+    """
+    prefix tree of all the gibberish syllables. Text is scanned once from left to right,
+    always replacing the longest syllable starting at the current position. Characters
+    that do not start any syllable are copied as they are
+    """
+    # marks the end of a syllable in a node. It can never be a single character key
+    END = ''
+
+    def __init__(self, rev_dict):
+        # reverse dictionaries generated by the Scrambler come with the tree already built
+        trie = getattr(rev_dict, 'trie', None)
+        self.root = trie if trie is not None else self.build(rev_dict)
+
+    @classmethod
+    def build(cls, rev_dict):
+        """
+        :return: the prefix tree of a reverse dictionary, as nested dicts keyed by character
+        """
+        root = {}
+        for syl, mapping in iter_syllables(rev_dict):
+            node = root
+            for c in syl:
+                node = node.setdefault(c, {})
+            node[cls.END] = mapping
+        return root
+
+    def translate(self, text):
+        root = self.root
+        end_key = self.END
+        trans = []
+        i = 0
+        ln = len(text)
+        while i < ln:
+            # walk down the tree as far as the text allows, remembering the last complete syllable
+            node = root
+            match = None
+            j = i
+            while j < ln:
+                node = node.get(text[j])
+                if node is None:
+                    break
+                j += 1
+                if end_key in node:
+                    match = j, node[end_key]
+            if match is None:
+                trans.append(text[i])
+                i += 1
+            else:
+                i, mapping = match
+                trans.append(mapping)
+
+        return ''.join(trans)
+
+
+engines = {
+    'loop': LoopMatcher,
+    'regex': RegexMatcher,
+    'trie': TrieMatcher,
+}
+
+
+def get_engine(rev_dict, name='trie'):
+    """
+    :param rev_dict: reverse GibDict
+    :param name: name of the engine, one of the keys of `engines`
+    :return: the engine for this dictionary. Engines are built once and cached on the dictionary
+    """
+    try:
+        engine = engines[name]
+    except KeyError:
+        raise ValueError(f'no such reverse translation engine as "{name}"')
+    if hasattr(rev_dict, 'derived'):
+        return rev_dict.derived(f'engine_{name}', engine)
+    return engine(rev_dict)
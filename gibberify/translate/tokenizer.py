@@ -0,0 +1,58 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+"""
+Single-pass tokenizer used to split text into words, whitespace and punctuation
+"""
+
+import re
+
+# token kinds
+WORD = 'word'
+SPACE = 'space'
+PUNCT = 'punct'
+
+# every character is either a word character, whitespace or something else, so the
+# tokens always cover the whole text and joining them back gives the original
+_token_re = re.compile(rf'(?P<{WORD}>\w+)|(?P<{SPACE}>\s+)|(?P<{PUNCT}>[^\w\s]+)')
+# word (possibly empty) at the very end of a text
+_trailing_word_re = re.compile(r'\w*\Z')
+
+
+def tokenize(text):
+    """
+    scans the text once and splits it in consecutive tokens
+
+    :param text: any string
+    :return: a generator of (kind, span) tuples, where kind is one of WORD, SPACE or PUNCT
+             and span is the (start, end) index pair of the token in text
+    """
+    for match in _token_re.finditer(text):
+        yield match.lastgroup, match.span()
+
+
+def chunks(stream, size=2**16):
+    """
+    reads a text stream in chunks of roughly the given size, making sure words are not split
+    between chunks (unless a single word is longer than size)
+
+    :param stream: file-like object opened in text mode
+    :param size: number of characters to read at a time
+    :return: a generator of text chunks
+    """
+    carry = ''
+    while True:
+        block = stream.read(size)
+        if not block:
+            break
+        text = carry + block
+        # keep the last word for the next chunk, as it may continue there
+        cut = _trailing_word_re.search(text).start()
+        if cut == 0 and len(text) <= size:
+            carry = text
+            continue
+        if cut == 0:
+            cut = len(text)
+        yield text[:cut]
+        carry = text[cut:]
+    if carry:
+        yield carry
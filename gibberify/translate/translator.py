@@ -1,28 +1,179 @@
 # Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
 
-import re
 import random
+from multiprocessing import Pool
 
 # local imports
 from .. import utils
+from .tokenizer import tokenize, WORD
+from .reverse import get_engine
+
+
+class DictLoader(dict):
+    """
+    dict of all the available GibDicts, with `langin-langout` as keys
+
+    dictionaries are read from file only the first time they are accessed. Use `preload`
+    to load all of them in advance (e.g: for long running processes)
+    """
+    def __missing__(self, dict_code):
+        try:
+            lang_in, lang_out = dict_code.split('-')
+            content = utils.store.load('dicts', lang_in, lang_out)
+        except (ValueError, FileNotFoundError):
+            raise KeyError(dict_code)
+        self[dict_code] = content
+        return content
+
+    def __contains__(self, dict_code):
+        return super(DictLoader, self).__contains__(dict_code) or dict_code in self.available()
+
+    @staticmethod
+    def available():
+        """
+        :return: a list of the codes of all the dictionaries found on disk
+        """
+        dicts_dir = utils.data/'dicts'
+        if not dicts_dir.is_dir():
+            return []
+        return sorted(set(file.stem for file in dicts_dir.iterdir() if file.suffix in ('.p', utils.binary.SUFFIX)))
+
+    def preload(self):
+        """
+        load all the available dictionaries into memory
+        """
+        for dict_code in self.available():
+            self[dict_code]
+        return self
+
+
+def gibberify(gib_dict, text, rng=None):
+    """
+    translate a text from real language into a gibberish language
+
+    :param gib_dict: straight GibDict to use for translation
+    :param text: text to translate
+    :param rng: random.Random instance used to pick syllables for unknown ones
+    :return: the translated text
+    """
+    return _gibberify(gib_dict, text, rng)[0]
+
+
+def _gibberify(gib_dict, text, rng=None):
+    """
+    :return: the translated text, and whether it depends on randomly picked syllables
+    """
+    # generate translation based on syllables, leaving non-word parts of the sentence as they are
+    used_random = False
+    trans_list = []
+    for kind, (start, end) in tokenize(text):
+        w = text[start:end]
+        if kind == WORD:
+            # use syllabize to break down into syllables
+            syl = utils.syllabize(w)
+            # translate syllables only if they are found, otherwise return a random one
+            trans_syl = []
+            for s in syl:
+                trans_s = gib_dict.get(s)
+                if trans_s is None:
+                    trans_s = gib_dict.random_syllable(rng)
+                    used_random = True
+                trans_syl.append(trans_s)
+            # save word translation
+            trans_w = ''.join(trans_syl)
+            # let's preserve capitalisation, at least a bit
+            if w[0].isupper():
+                if w.isupper() and len(w) >= 2:
+                    trans_w = trans_w.upper()
+                else:
+                    trans_w = trans_w.capitalize()
+        else:
+            trans_w = w
+
+        trans_list.append(trans_w)
+
+    # join everything
+    return ''.join(trans_list), used_random
+
+
+def degibberify(rev_dict, text, engine='trie'):
+    """
+    translate a text from gibberish back into a real language, assuming that longer
+    matching syllables are more likely to be single syllables than a combination
+    of multiple small ones. WARNING: VERY HACKY!
+
+    the default 'trie' engine reads the text once from left to right, always taking the longest syllable
+    starting at the current position. This is NOT the same as the older 'loop' and 'regex' engines, which
+    replace the longest syllables anywhere in the text first: when syllables overlap, the results differ
+    (e.g.: with `ab`, `bcd`, `a` and `cd` all in the dictionary, `abcd` is read as `ab|cd` by the trie
+    and as `a|bcd` by the others). Pass engine='regex' to get the old behaviour
+
+    :param rev_dict: reverse GibDict to use for translation
+    :param text: text to translate
+    :param engine: name of the reverse translation engine (see `reverse.engines`)
+    :return: something that may resemble the original message
+    """
+    # only words need translating: join them with spaces (which can never be part of a syllable)
+    # and put punctuation and whitespace back in place at the end
+    tokens = list(tokenize(text))
+    words = [text[start:end] for kind, (start, end) in tokens if kind == WORD]
+    if not words:
+        return text
+
+    trans = get_engine(rev_dict, engine).translate(' '.join(words))
+
+    trans_words = iter(trans.split(' '))
+    return ''.join(next(trans_words) if kind == WORD else text[start:end]
+                   for kind, (start, end) in tokens)
+
+
+def translate(gib_dict, text, rng=None, engine='trie'):
+    """
+    translate a text with the given dictionary, in whichever direction it goes.
+    This has no side effects, other than using rng
+
+    :return: the translated text
+    """
+    if gib_dict.reverse:
+        return degibberify(gib_dict, text, engine=engine)
+    return gibberify(gib_dict, text, rng=rng)
+
+
+def _translate_checked(gib_dict, text, rng=None, engine='trie'):
+    """
+    :return: the translated text, and whether it depends on randomly picked syllables
+    """
+    if gib_dict.reverse:
+        return degibberify(gib_dict, text, engine=engine), False
+    return _gibberify(gib_dict, text, rng=rng)
 
 
 class Translator:
     """
     executes translations according to current configuration and inputs
     """
-    def __init__(self, lang_in=None, lang_out=None, text_in='', dicts=None):
+    def __init__(self, lang_in=None, lang_out=None, text_in='', dicts=None, rng=None, engine='trie', preload=False,
+                 cache=None):
         """
         :param lang_in: language to translate from
         :param lang_out: language to transate to
         :param text_in: texto to translate
         :param dicts: override loading of dictionaries by providing some via parameter
+        :param rng: random.Random instance used to pick syllables for unknown ones. Pass a
+                    seeded one to get reproducible translations
+        :param engine: name of the engine used for reverse translation (see `reverse.engines`)
+        :param preload: load all the dictionaries immediately instead of when they are first needed
+        :param cache: cache translation results in this LRUCache (which can be shared between translators
+                      and threads), or in a new one with this maximum size. Disabled if None
         """
         self.lang_in = lang_in
         self.lang_out = lang_out
         self.text_in = text_in
         self.text_out = ''
-        self.dicts = self.load_dicts(dicts)
+        self.rng = rng
+        self.engine = engine
+        self.cache = utils.LRUCache(cache) if isinstance(cache, int) else cache
+        self.dicts = self.load_dicts(dicts, preload=preload)
         self.dict = None
 
     def __str__(self):
@@ -30,120 +181,139 @@ class Translator:
         self.run()
         return self.text_out
 
-    def __setattr__(self, key, value):
-        # detect if important attributes change and automagically run translation if so
-        attr_list = ('lang_in', 'lang_out', 'text_in', 'dicts')
-        changed = False
-        if not hasattr(self, key) or getattr(self, key) != value:
-            if key in attr_list:
-                changed = True
-
-        super(Translator, self).__setattr__(key, value)
-
-        # only run if all attributes have a value
-        if changed and all([attr in self.__dict__ for attr in attr_list]):
-            self.run()
-
     def __call__(self, text=None):
         if text is not None:
             self.text_in = text
         self.run()
         return self.text_out
 
-    def load_dicts(self, dicts=None):
+    def get_dict(self, lang_in=None, lang_out=None):
+        """
+        :return: the dictionary for the given languages (the current ones by default)
         """
-        loads all generated dictionaries into memory
+        lang_in = lang_in or self.lang_in
+        lang_out = lang_out or self.lang_out
+        return self.dicts[f'{lang_in}-{lang_out}']
 
-        :return: a dict containing all the available dictionaries, with `langin-langout` as keys
+    def translate(self, text, lang_in=None, lang_out=None):
         """
-        if not dicts:
-            dicts = {}
-            dicts_dir = utils.data/'dicts'
-            dict_files = [file for file in dicts_dir.iterdir() if file.suffix == '.p']
-            for dict_file in dict_files:
-                dict_code = dict_file.stem
-                lang_in, lang_out = dict_code.split('-')
-                content = utils.access_data('dicts', lang_in, lang_out)
-                dicts[dict_code] = content
+        translate a text without changing the state of the translator
 
-        return dicts
+        :param lang_in: language to translate from. Defaults to the current one
+        :param lang_out: language to translate to. Defaults to the current one
+        :return: the translated text
+        """
+        lang_in = lang_in or self.lang_in
+        lang_out = lang_out or self.lang_out
+        return self._translate(f'{lang_in}-{lang_out}', self.get_dict(lang_in, lang_out), text)
 
-    def gibberify(self):
+    def _translate(self, dict_code, gib_dict, text):
+        """
+        translate a text, going through the result cache if there is one
+        """
+        if self.cache is None:
+            return translate(gib_dict, text, rng=self.rng, engine=self.engine)
+
+        result = self._cached(dict_code, gib_dict, text)
+        if result is None:
+            result, used_random = _translate_checked(gib_dict, text, rng=self.rng, engine=self.engine)
+            self._store(dict_code, gib_dict, text, result, used_random)
+        return result
+
+    def _cached(self, dict_code, gib_dict, text):
+        """
+        :return: the cached translation of text, or None if there is none
+        """
+        if self.cache is None:
+            return None
+        cached = self.cache.get((dict_code, self.engine, text))
+        # results made with dictionaries that were since replaced don't count
+        if cached is not None and cached[0] is gib_dict:
+            return cached[1]
+        return None
+
+    def _store(self, dict_code, gib_dict, text, result, used_random):
+        """
+        add a result to the cache, if there is one. Only deterministic results are cached: reverse
+        translations always are, but translations that picked random syllables for unknown ones
+        would give a different result every time
+        """
+        if self.cache is not None and not used_random:
+            self.cache.put((dict_code, self.engine, text), (gib_dict, result))
+
+    def stream(self, chunks):
+        """
+        translate a sequence of texts one after the other, using the current languages.
+        Results are not cached, since chunks of a stream are rarely repeated
+
+        :param chunks: iterable of strings (see `tokenizer.chunks` to read a file piece by piece)
+        :return: a generator of translated strings
+        """
+        gib_dict = self.get_dict()
+        for chunk in chunks:
+            yield translate(gib_dict, chunk, rng=self.rng, engine=self.engine)
+
+    def translate_many(self, texts, lang_in=None, lang_out=None, workers=None, chunksize=256):
         """
-        translate a text from real language into a specified gibberish language
+        translate a batch of texts, optionally spreading the work over several processes. Each
+        process receives the dictionary only once, when it starts. The result cache is used in
+        both cases; with several processes, a seeded rng gives each text its own seed, so results
+        are reproducible (regardless of the number of processes) but differ from in-process ones
 
-        sets translation to text_out
+        :param texts: iterable of strings
+        :param lang_in: language to translate from. Defaults to the current one
+        :param lang_out: language to translate to. Defaults to the current one
+        :param workers: number of processes to use. If None or 1, translate in the current process
+        :param chunksize: number of texts sent to a process at a time
+        :return: list of translations, in the same order as texts
         """
-        # split words maintaining non-word characters in the right positions
-        words = re.split(r'(\W+)(\w+)', self.text_in)
+        gib_dict = self.get_dict(lang_in, lang_out)
+        dict_code = f'{lang_in or self.lang_in}-{lang_out or self.lang_out}'
+
+        if not workers or workers <= 1:
+            return [self._translate(dict_code, gib_dict, text) for text in texts]
 
-        # generate translation based on syllables
-        trans_list = []
-        # use syllabize to break down into syllables
-        for w in words:
-            # leave non-word parts of the sentence as is
-            if re.match(r'\w+', w):
-                syl = utils.syllabize(w)
-                # translate syllables only if they are found, otherwise return a random one
-                trans_syl = [self.dict.get(s.lower(), random.choice(list(self.dict)))
-                             for s in syl]
-                # save word translation
-                trans_w = ''.join(trans_syl)
-                # let's preserve capitalisation, at least a bit
-                if w[0].isupper():
-                    if w.isupper() and len(w) >= 2:
-                        trans_w = trans_w.upper()
-                    else:
-                        trans_w = trans_w.capitalize()
-            else:
-                trans_w = w
+        texts = list(texts)
+        results = [self._cached(dict_code, gib_dict, text) for text in texts]
+        missing = [i for i, result in enumerate(results) if result is None]
+        base_seed = self.rng.getrandbits(64) if self.rng is not None else None
+        jobs = [(texts[i], None if base_seed is None else f'{base_seed}-{i}') for i in missing]
+
+        with Pool(workers, initializer=_init_worker, initargs=(gib_dict, self.engine)) as pool:
+            for i, (result, used_random) in zip(missing, pool.imap(_translate_in_worker, jobs, chunksize)):
+                self._store(dict_code, gib_dict, texts[i], result, used_random)
+                results[i] = result
+        return results
+
+    def load_dicts(self, dicts=None, preload=False):
+        """
+        prepares all generated dictionaries for use. Dictionaries are loaded into memory
+        when they are first needed, unless preload is True
 
-            trans_list.append(trans_w)
+        :return: a dict containing all the available dictionaries, with `langin-langout` as keys
+        """
+        if dicts is None:
+            dicts = DictLoader()
+            if preload:
+                dicts.preload()
 
-        # join everything
-        trans = ''.join(trans_list)
+        return dicts
 
-        # remove multiple spaces due to input or unmapped syllables
-        trans = re.sub(' +', ' ', trans)
+    def gibberify(self):
+        """
+        translate text_in from real language into the current gibberish language
 
-        return trans
+        :return: the translated text
+        """
+        return gibberify(self.dict, self.text_in, rng=self.rng)
 
     def degibberify(self):
         """
-        translate a text from real language into a specified gibberish language, assuming
-        that longer matching syllables are more likely to be single syllables than a combination
-        of multiple small ones. WARNING: VERY HACKY!
-
-        sets something that may resemble the original message to text_out
-        """
-        # get list of syllable lengths
-        lns = list(self.dict.keys())
-        lns.sort(reverse=True)
-
-        # save two versions of the text which need to be processed in parallel
-        trans = self.text_in
-        trans_tmp = trans
-        # start from longest syllables
-        for ln in lns:
-            for syl, mapping in self.dict[ln].items():
-                # if syllable is found in the text
-                for match in re.finditer(syl, trans_tmp):
-                    # save start and end index of the matched syllable
-                    start, end = match.span()
-                    # The following shenanigans are needed because we need to make sure already replaced
-                    # syllables are not matched again to a new mapping (hence the placeholders)
-                    # this needs to be done with len(mapping) because matched syllables and their mappings are NOT
-                    # the same length!
-                    # replace matched syllable with placeholders in temp translation,
-                    trans_tmp = ''.join([c for c in trans_tmp[:start]] +
-                                        ['�'] * len(mapping) +
-                                        [x for x in trans_tmp[end:]])
-                    # replace in real translation with ACTUAL mapping
-                    trans = ''.join([c for c in trans[:start]] +
-                                    [c for c in mapping] +
-                                    [x for x in trans[end:]])
-
-        return trans
+        translate text_in from the current gibberish language into a real language
+
+        :return: the translated text
+        """
+        return degibberify(self.dict, self.text_in, engine=self.engine)
 
     def run(self):
         """
@@ -154,15 +324,55 @@ class Translator:
             return
 
         # update current dictionary
-        dict_code = f'{self.lang_in}-{self.lang_out}'
         try:
-            self.dict = self.dicts[dict_code]
+            self.dict = self.get_dict()
         except KeyError:
             # this is raised if the dictionary does not exist (usually because in between changes)
             return
 
-        # check if current translator is straight or reverse
-        if not self.dict.reverse:
-            self.text_out = self.gibberify()
+        self.text_out = self._translate(f'{self.lang_in}-{self.lang_out}', self.dict, self.text_in)
+
+
+class ReactiveTranslator(Translator):
+    """
+    Translator that automatically runs a translation every time its languages,
+    input text or dictionaries change, so text_out is always up to date (used by the GUI)
+    """
+    def __setattr__(self, key, value):
+        # detect if important attributes change and automagically run translation if so
+        attr_list = ('lang_in', 'lang_out', 'text_in', 'dicts')
+        changed = False
+        if not hasattr(self, key) or getattr(self, key) != value:
+            if key in attr_list:
+                changed = True
+
+        super(ReactiveTranslator, self).__setattr__(key, value)
+
+        # only run if all attributes have a value
+        if changed and all([attr in self.__dict__ for attr in attr_list]):
+            self.run()
+
+    def __call__(self, text=None):
+        # setting a new text already runs the translation
+        if text is not None and text != self.text_in:
+            self.text_in = text
         else:
-            self.text_out = self.degibberify()
+            self.run()
+        return self.text_out
+
+
+# dictionary used by each translate_many worker process
+_worker_dict = None
+_worker_engine = None
+
+
+def _init_worker(gib_dict, engine):
+    global _worker_dict, _worker_engine
+    _worker_dict = gib_dict
+    _worker_engine = engine
+
+
+def _translate_in_worker(job):
+    text, seed = job
+    rng = random.Random(seed) if seed is not None else None
+    return _translate_checked(_worker_dict, text, rng=rng, engine=_worker_engine)
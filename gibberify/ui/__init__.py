@@ -2,3 +2,4 @@
 
 from .gui import gui
 from .interactive import interactive
+from .server import serve
@@ -17,7 +17,7 @@ from PyQt5.QtCore import QSize, pyqtSignal
 from .. import utils
 from ..config import Config, ConfigError
 from ..generate import build
-from ..translate import Translator
+from ..translate import ReactiveTranslator
 
 
 class LangMenu(QComboBox):
@@ -234,6 +234,9 @@ class SettingsWindow(QMainWindow):
             self.gib_tabs.addTab(new_lang, code.lower())
             # add to widget dictionary
             self.gib_langs_widgets[code.lower()] = new_lang
+            # options that are not editable here (seed, mapping...) are kept as they are when saving
+            new_lang.extra_options = {opt: value for opt, value in (default_options or {}).items()
+                                      if opt not in self.gib_options}
 
             # create option boxes
             for i, (option, desc) in enumerate(self.gib_options.items()):
@@ -348,6 +351,7 @@ class SettingsWindow(QMainWindow):
                     option = child.objectName()
                     values = child.text()
                     conf['gib_langs'][gib_lang][option] = values.lower().split()
+            conf['gib_langs'][gib_lang].update(tab.extra_options)
 
         # if real languages are used for gib_langs but not ticked, add them back in
         for _, options in conf['gib_langs'].items():
@@ -535,7 +539,7 @@ class MainWindow(QMainWindow):
         self.lang_out_box.addItems([lang for lang in self.conf['gib_langs']])
 
         self.update_languages()
-        self.translator.load_dicts()
+        self.translator.dicts = self.translator.load_dicts()
 
 
 def gui():
@@ -545,7 +549,7 @@ def gui():
     app = QApplication(sys.argv)
     app.setApplicationName('Gibberify')
 
-    translator = Translator()
+    translator = ReactiveTranslator()
     window = MainWindow(translator)
 
     # catch KeyboardInterrupt
@@ -51,8 +51,7 @@ def interactive():
 
             if level == 2:
                 text = input('What do you want to translate?\n')
-                translator.text_in = text
-                print(translator)
+                print(translator(text))
                 continue
 
         except KeyboardInterrupt:
@@ -0,0 +1,250 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+"""
+Local HTTP server to translate text through a JSON api, using asyncio
+
+Endpoints:
+    GET  /health        -> {"status": "ok"}
+    GET  /languages     -> {"dicts": ["en-orc", ...]}
+    POST /translate     <- {"from": "en", "to": "orc", "text": "..."}  -> {"text": "..."}
+                        <- {"from": "en", "to": "orc", "texts": [...]} -> {"texts": [...]}
+"""
+
+import json
+import asyncio
+from http import HTTPStatus
+from concurrent.futures import ThreadPoolExecutor
+
+# local imports
+from .. import utils
+from ..translate import Translator, DictLoader
+
+
+class HTTPError(Exception):
+    """
+    error raised while handling a request, turned into an error response
+    """
+    def __init__(self, status, message):
+        super(HTTPError, self).__init__(message)
+        self.status = status
+
+
+class TranslatorPool:
+    """
+    keeps a warm Translator for each language pair, all sharing the same dictionaries
+    and the same result cache (if any)
+    """
+    def __init__(self, dicts=None, preload=False, cache=None):
+        """
+        :param cache: LRUCache for translation results, or its maximum size. Disabled if None
+        """
+        self.dicts = dicts if dicts is not None else DictLoader()
+        self.cache = utils.LRUCache(cache) if isinstance(cache, int) else cache
+        if preload:
+            if isinstance(self.dicts, DictLoader):
+                self.dicts.preload()
+            utils.hyphenators.get()
+        self.translators = {}
+
+    def available(self):
+        """
+        :return: list of the codes of all the available dictionaries
+        """
+        if isinstance(self.dicts, DictLoader):
+            return self.dicts.available()
+        return sorted(self.dicts)
+
+    def get(self, lang_in, lang_out):
+        """
+        :return: the Translator for this language pair
+        """
+        dict_code = f'{lang_in}-{lang_out}'
+        if dict_code not in self.translators:
+            if dict_code not in self.dicts:
+                raise HTTPError(HTTPStatus.NOT_FOUND, f'no dictionary for "{dict_code}"')
+            self.translators[dict_code] = Translator(lang_in, lang_out, dicts=self.dicts, cache=self.cache)
+        return self.translators[dict_code]
+
+    def loaded(self, lang_in, lang_out):
+        """
+        :return: True if the dictionary for this language pair is already in memory
+        """
+        dict_code = f'{lang_in}-{lang_out}'
+        if isinstance(self.dicts, DictLoader):
+            return dict.__contains__(self.dicts, dict_code)
+        return dict_code in self.dicts
+
+    def is_reverse(self, lang_in, lang_out):
+        self.get(lang_in, lang_out)
+        return self.dicts[f'{lang_in}-{lang_out}'].reverse
+
+    def translate(self, lang_in, lang_out, texts):
+        """
+        translate a list of texts, one after the other. Translation does not change the state
+        of the translator, so this can be called from several threads at once
+        """
+        translator = self.get(lang_in, lang_out)
+        return [translator.translate(text) for text in texts]
+
+
+class Server:
+    """
+    asyncio HTTP/1.1 server with keep-alive. Translations into gibberish are quick and run
+    directly in the event loop, while reverse translations are sent to a thread pool
+    """
+    max_body = 2**24
+
+    def __init__(self, host='127.0.0.1', port=8080, pool=None, workers=None):
+        """
+        :param host: address to listen on. Defaults to localhost only
+        :param port: port to listen on
+        :param pool: TranslatorPool to use. A new one is made if not provided
+        :param workers: number of threads for reverse translations
+        """
+        self.host = host
+        self.port = port
+        self.pool = pool or TranslatorPool()
+        self.executor = ThreadPoolExecutor(workers)
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        # when port 0 is requested, find out which one was picked
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.executor.shutdown()
+
+    async def handle(self, reader, writer):
+        """
+        serve all the requests coming from a single connection
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                keep_alive = await self.respond(request_line, reader, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, request_line, reader, writer):
+        """
+        read the rest of a request, dispatch it and write the response
+        :return: True if the connection should be kept open
+        """
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+
+        try:
+            method, target, protocol = request_line.decode('latin-1').split()
+        except ValueError:
+            method, target, protocol = '', '', 'HTTP/1.0'
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection == 'keep-alive' if protocol == 'HTTP/1.0' else connection != 'close'
+
+        try:
+            if not method:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, 'malformed request line')
+            try:
+                length = int(headers.get('content-length', 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                # we can't tell where the body ends, so the connection can't be reused
+                keep_alive = False
+                raise HTTPError(HTTPStatus.BAD_REQUEST, 'invalid Content-Length')
+            if length > self.max_body:
+                keep_alive = False
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'request body is too large')
+            body = await reader.readexactly(length) if length else b''
+            status, response = HTTPStatus.OK, await self.dispatch(method, target, body)
+        except HTTPError as e:
+            status, response = e.status, {'error': str(e)}
+        except Exception as e:
+            status, response = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': repr(e)}
+
+        payload = json.dumps(response).encode('utf-8')
+        head = (f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+                f'Content-Type: application/json\r\n'
+                f'Content-Length: {len(payload)}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+        writer.write(head.encode('latin-1') + payload)
+        await writer.drain()
+        return keep_alive
+
+    async def dispatch(self, method, target, body):
+        """
+        :return: the json-serializable response for the request
+        """
+        path = target.partition('?')[0]
+        if path == '/health' and method == 'GET':
+            if self.pool.cache is not None:
+                return {'status': 'ok', 'cache': self.pool.cache.stats()}
+            return {'status': 'ok'}
+        if path == '/languages' and method == 'GET':
+            return {'dicts': self.pool.available()}
+        if path == '/translate':
+            if method != 'POST':
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, 'use POST to translate')
+            return await self.translate(body)
+        raise HTTPError(HTTPStatus.NOT_FOUND, f'nothing at {path}')
+
+    async def translate(self, body):
+        try:
+            request = json.loads(body.decode('utf-8'))
+            lang_in, lang_out = request['from'], request['to']
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'expected a json object with "from", "to" and "text" or "texts"')
+
+        batch = 'texts' in request
+        texts = request['texts'] if batch else [request.get('text', '')]
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, '"text" must be a string and "texts" a list of strings')
+
+        loop = asyncio.get_event_loop()
+        if self.pool.loaded(lang_in, lang_out):
+            reverse = self.pool.is_reverse(lang_in, lang_out)
+        else:
+            # the first time, the dictionary is read from disk: don't keep the other clients waiting meanwhile
+            reverse = await loop.run_in_executor(self.executor, self.pool.is_reverse, lang_in, lang_out)
+
+        if reverse:
+            translated = await loop.run_in_executor(self.executor, self.pool.translate, lang_in, lang_out, texts)
+        else:
+            translated = self.pool.translate(lang_in, lang_out, texts)
+
+        return {'texts': translated} if batch else {'text': translated[0]}
+
+
+def serve(host='127.0.0.1', port=8080, preload=False, workers=None, cache=0, cache_ttl=None):
+    """
+    run the translation server until interrupted
+    :param preload: load all the dictionaries before accepting requests
+    :param cache: maximum number of translation results to cache. Disabled if 0
+    :param cache_ttl: number of seconds after which cached results expire. If None, they never do
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    result_cache = utils.LRUCache(cache, ttl=cache_ttl) if cache else None
+    server = Server(host, port, pool=TranslatorPool(preload=preload, cache=result_cache), workers=workers)
+    loop.run_until_complete(server.start())
+    print(f'Gibberify is serving translations on http://{server.host}:{server.port}')
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.close())
+        loop.close()
@@ -1,5 +1,8 @@
 # Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
 
-from .general import access_data, __version__, basedir, assets, data, conf, conf_default, \
-    check_dirs, VersionError, uninstall
-from .pyphen import syllabize, r_lang_codes
+from .general import __version__, basedir, assets, data, conf, conf_default, \
+    check_dirs, check_version, VersionError, uninstall
+from .cache import DerivedData, LRUCache, PersistentLRUCache
+from .pyphen import syllabize, r_lang_codes, hyphenators, HyphenatorRegistry, syllable_cache
+from .binary import write_binary, open_binary, convert, convert_all, MappedDict, MappedPool
+from .store import DataStore, store, access_data
@@ -0,0 +1,285 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+"""
+Compact binary format for dictionaries and syllable pools, read through mmap
+
+Data is stored as sorted string tables, so it can be searched in place without building
+Python objects for the whole file, and the same pages are shared by all the processes
+that open it. All integers are little-endian. The layout of a file is:
+
+    magic           4 bytes     b'GIBB'
+    format version  uint16
+    header length   uint32
+    header          utf-8 json with the metadata (type, gibberify version, languages...)
+    padding         up to a multiple of 4 bytes
+    count           uint32      number of entries
+    key offsets     uint32 * (count + 1)
+    value offsets   uint32 * (count + 1)    (dictionaries only)
+    keys            utf-8 strings, sorted by their encoded bytes
+    values          utf-8 strings           (dictionaries only)
+"""
+
+import sys
+import json
+import mmap
+import pickle
+import random
+import struct
+from array import array
+from pathlib import Path
+from collections.abc import Mapping, Sequence
+
+# local imports
+from .general import VersionError, check_version
+from .cache import DerivedData
+
+MAGIC = b'GIBB'
+FORMAT_VERSION = 1
+SUFFIX = '.gib'
+
+_prelude = struct.Struct('<4sHI')
+_uint = struct.Struct('<I')
+
+
+def _pad(ln):
+    return -ln % 4
+
+
+def _offsets(strings):
+    offsets = array('I', [0])
+    for s in strings:
+        offsets.append(offsets[-1] + len(s))
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+    return offsets.tobytes()
+
+
+def iter_syllables(rev_dict):
+    """
+    :param rev_dict: reverse dictionary, either flat or split in buckets by syllable length
+    :return: a generator of (syllable, mapping) tuples
+    """
+    for key, value in rev_dict.items():
+        if isinstance(value, dict):
+            yield from value.items()
+        else:
+            yield key, value
+
+
+def write_binary(path, content):
+    """
+    write a GibDict or a GibPool to file in binary format
+    :param path: destination file
+    :param content: GibDict or GibPool
+    """
+    if isinstance(content, dict):
+        header = {
+            'type': 'dict',
+            'version': content.version,
+            'lang_in': content.lang_in,
+            'lang_out': content.lang_out,
+            'conf': content.conf,
+            'reverse': content.reverse,
+        }
+        items = sorted((k.encode('utf-8'), v.encode('utf-8')) for k, v in iter_syllables(content))
+        keys = [k for k, v in items]
+        values = [v for k, v in items]
+    else:
+        header = {
+            'type': 'pool',
+            'version': content.version,
+            'lang': content.lang,
+        }
+        keys = sorted(set(s.encode('utf-8') for s in content))
+        values = None
+
+    header = json.dumps(header).encode('utf-8')
+    with open(path, 'wb+') as f:
+        f.write(_prelude.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.write(b'\0' * _pad(_prelude.size + len(header)))
+        f.write(_uint.pack(len(keys)))
+        f.write(_offsets(keys))
+        if values is not None:
+            f.write(_offsets(values))
+        f.write(b''.join(keys))
+        if values is not None:
+            f.write(b''.join(values))
+
+
+def _read_header(f):
+    """
+    reads and checks the beginning of a binary file
+    :param f: file object opened in binary mode, positioned at the start
+    :return: the header dict and the position at which the data starts
+    """
+    magic, fmt, header_ln = _prelude.unpack(f.read(_prelude.size))
+    if magic != MAGIC:
+        raise ValueError(f'{f.name} is not a gibberify binary file')
+    if fmt != FORMAT_VERSION:
+        raise VersionError(f'{f.name} uses binary format version {fmt}, expected {FORMAT_VERSION}')
+    header = json.loads(f.read(header_ln).decode('utf-8'))
+    check_version(header['version'])
+    pos = _prelude.size + header_ln
+    return header, pos + _pad(pos)
+
+
+class _Table(DerivedData):
+    """
+    sorted string table (with optional values) backed by a memory-mapped file
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self.header, pos = _read_header(f)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.count = _uint.unpack_from(self._mm, pos)[0]
+        pos += _uint.size
+        self._key_offsets = self._read_offsets(pos)
+        pos += 4 * (self.count + 1)
+        if self.header['type'] == 'dict':
+            self._value_offsets = self._read_offsets(pos)
+            pos += 4 * (self.count + 1)
+        self._keys_start = pos
+        self._values_start = pos + self._key_offsets[self.count]
+
+    def _read_offsets(self, pos):
+        view = memoryview(self._mm)[pos:pos + 4 * (self.count + 1)]
+        if sys.byteorder == 'little':
+            return view.cast('I')
+        offsets = array('I', view.tobytes())
+        offsets.byteswap()
+        return offsets
+
+    def _key(self, i):
+        start = self._keys_start
+        return self._mm[start + self._key_offsets[i]:start + self._key_offsets[i + 1]]
+
+    def _value(self, i):
+        start = self._values_start
+        return self._mm[start + self._value_offsets[i]:start + self._value_offsets[i + 1]].decode('utf-8')
+
+    def _find(self, key):
+        """
+        binary search of a key
+        :return: index of key, or -1 if not found
+        """
+        target = key.encode('utf-8')
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._key(lo) == target:
+            return lo
+        return -1
+
+    def __len__(self):
+        return self.count
+
+    def __reduce__(self):
+        # reopen the file instead of copying the data (e.g: when sent to another process)
+        return open_binary, (self.path,)
+
+
+class MappedDict(_Table, Mapping):
+    """
+    read-only, memory-mapped version of a GibDict
+    """
+    def __init__(self, path):
+        super(MappedDict, self).__init__(path)
+        self.lang_in = self.header['lang_in']
+        self.lang_out = self.header['lang_out']
+        self.conf = self.header['conf']
+        self.version = self.header['version']
+        self.reverse = self.header['reverse']
+
+    def __getitem__(self, key):
+        i = self._find(key)
+        if i < 0:
+            raise KeyError(key)
+        return self._value(i)
+
+    def __contains__(self, key):
+        return self._find(key) >= 0
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self._key(i).decode('utf-8')
+
+    def items(self):
+        return [(self._key(i).decode('utf-8'), self._value(i)) for i in range(self.count)]
+
+    def random_syllable(self, rng=None):
+        """
+        pick a random key in constant time
+        :param rng: random.Random instance to use (for reproducible results). Defaults to the global one
+        """
+        return self._key((rng or random).randrange(self.count)).decode('utf-8')
+
+
+class MappedPool(_Table, Sequence):
+    """
+    read-only, memory-mapped version of a GibPool
+    """
+    def __init__(self, path):
+        super(MappedPool, self).__init__(path)
+        self.lang = self.header['lang']
+        self.version = self.header['version']
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.count))]
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError('pool index out of range')
+        return self._key(i).decode('utf-8')
+
+    def __contains__(self, syllable):
+        return self._find(syllable) >= 0
+
+
+def open_binary(path):
+    """
+    open a binary file with the right class for its content
+    :return: a MappedDict or a MappedPool
+    """
+    with open(path, 'rb') as f:
+        header, _ = _read_header(f)
+    if header['type'] == 'dict':
+        return MappedDict(path)
+    return MappedPool(path)
+
+
+def convert(path):
+    """
+    convert a pickled GibDict or GibPool (.p file) to binary format, saved next to it
+    :return: path to the new file
+    """
+    path = Path(path)
+    with open(path, 'rb') as f:
+        content = pickle.load(f)
+    check_version(content.version)
+    new_path = path.with_suffix(SUFFIX)
+    write_binary(new_path, content)
+    return new_path
+
+
+def convert_all(data_dir):
+    """
+    convert all the generated dictionaries and syllable pools found in data_dir to binary format
+    :return: list of the converted files
+    """
+    converted = []
+    for data_type in ('syllables', 'dicts'):
+        directory = Path(data_dir)/data_type
+        if not directory.is_dir():
+            continue
+        for file in sorted(directory.iterdir()):
+            if file.suffix == '.p':
+                converted.append(convert(file))
+    return converted
@@ -0,0 +1,185 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+"""
+Bounded caches used to avoid repeating expensive work
+"""
+
+import time
+import atexit
+import pickle
+import threading
+from collections import OrderedDict
+
+
+class DerivedData:
+    """
+    mixin for read-only containers, caching data derived from their contents
+    (such as the array of keys used for random sampling) in the `_derived` attribute
+    """
+    def derived(self, name, factory):
+        """
+        :param name: name of the derived data
+        :param factory: callable taking this container and returning the derived data
+        :return: the cached derived data, computing it first if needed
+        """
+        derived = self.__dict__.setdefault('_derived', {})
+        if name not in derived:
+            derived[name] = factory(self)
+        return derived[name]
+
+
+class LRUCache:
+    """
+    least-recently-used cache with a maximum size and an optional time-to-live,
+    keeping track of hits, misses, evictions and expirations. It can be shared between threads
+    """
+    def __init__(self, maxsize=2**16, ttl=None, clock=time.monotonic):
+        """
+        :param maxsize: maximum number of entries. If None, the cache is unbounded
+        :param ttl: number of seconds after which an entry expires. If None, entries never expire
+        :param clock: function returning the current time in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()
+        self._expiry = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data and not self._expired(key)
+
+    def _expired(self, key):
+        return self.ttl is not None and self._expiry[key] <= self.clock()
+
+    def get(self, key, default=None):
+        """
+        :return: the cached value for key (marking it as recently used), or default if missing or expired
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if self._expired(key):
+                del self._data[key]
+                del self._expiry[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        store a value, evicting the least recently used entries if the cache is full
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.ttl is not None:
+                self._expiry[key] = self.clock() + self.ttl
+            self._shrink()
+
+    def resize(self, maxsize):
+        """
+        change the maximum size of the cache, evicting entries if needed
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            self._shrink()
+
+    def _shrink(self):
+        if self.maxsize is None:
+            return
+        while len(self._data) > self.maxsize:
+            key, _ = self._data.popitem(last=False)
+            self._expiry.pop(key, None)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        remove all the entries and reset the statistics
+        """
+        with self._lock:
+            self._data.clear()
+            self._expiry.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        """
+        :return: a dict with the current size and the hit/miss/eviction/expiration counters
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+class PersistentLRUCache(LRUCache):
+    """
+    LRUCache that can be saved to and restored from a file. A `tag` is stored together with
+    the entries, and files with a different tag are ignored (e.g: after a change in settings)
+    """
+    def __init__(self, maxsize=2**16, path=None, tag=None):
+        super(PersistentLRUCache, self).__init__(maxsize)
+        self.path = path
+        self.tag = tag
+        self._atexit = False
+
+    def load(self, path=None):
+        """
+        fill the cache with the entries saved in the file, if it exists and is compatible
+        :return: the number of loaded entries
+        """
+        path = path or self.path
+        try:
+            with open(path, 'rb') as f:
+                tag, entries = pickle.load(f)
+        except (FileNotFoundError, EOFError, ValueError, pickle.UnpicklingError):
+            return 0
+        if tag != self.tag:
+            return 0
+        for key, value in entries:
+            self.put(key, value)
+        return len(entries)
+
+    def save(self, path=None):
+        """
+        write all the entries to file, from least to most recently used
+        """
+        path = path or self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            entries = list(self._data.items())
+        with open(path, 'wb+') as f:
+            pickle.dump((self.tag, entries), f)
+
+    def persist(self, path=None):
+        """
+        load the cache from file now and save it back when the interpreter exits
+        """
+        if path is not None:
+            self.path = path
+        self.load()
+        if not self._atexit:
+            atexit.register(self.save)
+            self._atexit = True
@@ -7,9 +7,9 @@ Collection of general utilities and globals used by several modules
 import os
 import sys
 from packaging import version
-import pickle
 import platform
 import shutil
+from functools import lru_cache
 from pathlib import Path
 
 
@@ -59,41 +59,19 @@ def check_dirs():
         os.makedirs(path, exist_ok=True)
 
 
-def access_data(data_type, lang_in, lang_out=None, write_data=None):
+@lru_cache(maxsize=None)
+def _major_version(version_string):
+    return version.parse(version_string).release[0]
+
+
+def check_version(data_version):
     """
-    utility function to load or write data files
-    :param data_type: type of data to access (raw, words, syllables or dicts)
-    :param lang_in: (input) language code
-    :param lang_out: output language code.
-    :param write_data: data pickleable format. If not present, data is read from file and returned instead
-    :return: contents of the file in pickleable format, if any
+    make sure that data generated by the given version of gibberify can be used by the current one
+    :param data_version: version string saved with the data
     """
-    check_dirs()
-    if data_type == 'dicts':
-        if not lang_out:
-            raise AttributeError('you must specify an output language to access a dictionary')
-        name = f'{lang_in}-{lang_out}'
-    elif data_type in ('syllables', 'words'):
-        name = lang_in
-    else:
-        raise ValueError(f'no such data type as "{data_type}"')
-
-    mode = 'rb'
-    if write_data:
-        mode = 'wb+'
-
-    file_path = data/data_type/f'{name}.p'
-
-    with open(file_path, mode) as f:
-        if not write_data:
-            loaded = pickle.load(f)
-            v_load = version.parse(loaded.version).release
-            v_curr = version.parse(__version__).release
-            if v_load[0] < v_curr[0]:
-                raise VersionError('loaded data is from an old, non compatible version')
-            return loaded
-        else:
-            pickle.dump(write_data, f)
+    # parsed versions are cached, since this runs every time a file is loaded
+    if _major_version(data_version) < _major_version(__version__):
+        raise VersionError('loaded data is from an old, non compatible version')
 
 
 def uninstall(force=False):
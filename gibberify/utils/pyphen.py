@@ -7,38 +7,102 @@ Pyphen-based and other language-related utilities used in other modules
 import pyphen
 from collections import OrderedDict
 
+# local imports
+from .general import data, __version__
+from .cache import PersistentLRUCache
+
+
+class HyphenatorRegistry:
+    """
+    process-wide collection of pyphen hyphenators
+
+    hyphenators are expensive to set up, so they are only created the first time they are
+    needed and then reused for every word. The list of languages (and their order) can be
+    changed with `configure`, and `reset` drops the cached instances (useful for tests)
+    """
+    default_langs = ("en", "it", "de", "fr", "ru", "es", "nl", "ca", "el", "et", "is", "lt", "nb", "pt", "sk")
+
+    def __init__(self, langs=None):
+        self.langs = tuple(langs) if langs is not None else self.default_langs
+        self._hyphenators = None
+
+    def configure(self, langs=None):
+        """
+        change the languages used for hyphenation. Hyphenators are rebuilt lazily on next use
+        :param langs: ordered iterable of language codes. If None, revert to the default list
+        """
+        self.langs = tuple(langs) if langs is not None else self.default_langs
+        self.reset()
+        # syllables obtained with other hyphenators are not valid anymore
+        if self is hyphenators:
+            syllable_cache.tag = (__version__, self.langs)
+            syllable_cache.clear()
+
+    def reset(self):
+        """
+        forget all the cached hyphenators
+        """
+        self._hyphenators = None
+
+    @property
+    def loaded(self):
+        return self._hyphenators is not None
+
+    def get(self):
+        """
+        :return: a tuple of pyphen.Pyphen instances, built on first access
+        """
+        if self._hyphenators is None:
+            self._hyphenators = tuple(pyphen.Pyphen(lang=hyph_lang) for hyph_lang in self.langs)
+        return self._hyphenators
+
+
+# the one registry shared by the whole process
+hyphenators = HyphenatorRegistry()
+
+# syllabized words, shared by translation and syllable generation. Call `syllable_cache.persist()`
+# to keep it across restarts
+syllable_cache = PersistentLRUCache(path=data/'syllables.cache', tag=(__version__, hyphenators.langs))
+
 
 def super_hyphenator():
     """
     :return: a list of pyphen.Pyphen instances for a fixed list of languages
     """
-    langs = ["en", "it", "de", "fr", "ru", "es", "nl", "ca", "el", "et", "is", "lt", "nb", "pt", "sk"]
-    return [pyphen.Pyphen(lang=hyph_lang) for hyph_lang in langs]
+    return list(hyphenators.get())
 
 
-def syllabize(word):
+def syllabize(word, cache=True):
     """
     takes a word and reduces it to fundamental syllables using a list of
     pyphen hyphenators from several different languages
 
     :param word: a single word
-    :return: a set of syllables
+    :param cache: look up and store the result in the shared syllable_cache
+    :return: a list of syllables
     """
     word = word.lower()
 
+    if cache:
+        cached = syllable_cache.get(word)
+        if cached is not None:
+            return list(cached)
+
     # first get rid of apostrophes and such by splitting the word in sub-words
     syl = word.split('\'')
 
     # hyphenize using a bunch of languages. This ensures we cut down syllables to the most fundamental ones
     # TODO: using pyphen.LANGUAGES is kinda overkill, for now reverting back to using a fixed list
-    hyph_list = super_hyphenator()
-    for hyph in hyph_list:
+    for hyph in hyphenators.get():
         # do some list comprehension black magic to split up everything nicely
         syl = [s for w in syl for s in hyph.inserted(w).strip().split('-')]
 
     # nice trick to maintain order
     syllables = list(OrderedDict.fromkeys(syl))
 
+    if cache:
+        syllable_cache.put(word, tuple(syllables))
+
     return syllables
 
 
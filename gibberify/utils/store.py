@@ -0,0 +1,123 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+"""
+Access to the generated data files (word lists, syllable pools and dictionaries)
+"""
+
+import os
+import pickle
+from pathlib import Path
+
+# local imports
+from .general import data, check_version
+from . import binary
+
+
+class DataStore:
+    """
+    loads and saves data files under a root directory
+
+    directories are created only once, and binary files (see `binary`) are preferred to
+    pickled ones when both are present
+    """
+    data_types = ('words', 'syllables', 'dicts')
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self._dirs_ready = False
+
+    def check_dirs(self):
+        """
+        create directory tree for data if not present (only the first time, or if it was removed)
+        """
+        if self._dirs_ready and self.root.is_dir():
+            return
+        for d in self.data_types:
+            os.makedirs(self.root/d, exist_ok=True)
+        self._dirs_ready = True
+
+    def reset(self):
+        """
+        forget about the directory tree (e.g: after it was deleted)
+        """
+        self._dirs_ready = False
+
+    def path(self, data_type, lang_in, lang_out=None):
+        """
+        :return: path to the pickled file for the given data
+        """
+        if data_type == 'dicts':
+            if not lang_out:
+                raise AttributeError('you must specify an output language to access a dictionary')
+            name = f'{lang_in}-{lang_out}'
+        elif data_type in ('syllables', 'words'):
+            name = lang_in
+        else:
+            raise ValueError(f'no such data type as "{data_type}"')
+        return self.root/data_type/f'{name}.p'
+
+    @staticmethod
+    def _read(file_path, binary_exists):
+        if binary_exists:
+            return binary.open_binary(file_path.with_suffix(binary.SUFFIX))
+        with open(file_path, 'rb') as f:
+            loaded = pickle.load(f)
+        check_version(loaded.version)
+        return loaded
+
+    def load(self, data_type, lang_in, lang_out=None):
+        """
+        :return: contents of the file
+        """
+        file_path = self.path(data_type, lang_in, lang_out)
+        return self._read(file_path, file_path.with_suffix(binary.SUFFIX).is_file())
+
+    def load_many(self, data_type, langs):
+        """
+        load several files of the same type at once, listing the directory only once
+
+        :param langs: iterable of language codes, or (lang_in, lang_out) tuples for dictionaries
+        :return: a dict with the contents of each file, with the items of langs as keys
+        """
+        directory = self.root/data_type
+        binaries = {file.name for file in directory.iterdir() if file.suffix == binary.SUFFIX} \
+            if directory.is_dir() else set()
+        loaded = {}
+        for lang in langs:
+            args = lang if isinstance(lang, tuple) else (lang,)
+            file_path = self.path(data_type, *args)
+            loaded[lang] = self._read(file_path, file_path.with_suffix(binary.SUFFIX).name in binaries)
+        return loaded
+
+    def save(self, data_type, content, lang_in, lang_out=None):
+        """
+        write content to a pickled file, removing its binary version if present
+        """
+        self.check_dirs()
+        file_path = self.path(data_type, lang_in, lang_out)
+        with open(file_path, 'wb+') as f:
+            pickle.dump(content, f)
+        # a binary version of the old data would shadow the new one
+        bin_path = file_path.with_suffix(binary.SUFFIX)
+        if bin_path.is_file():
+            bin_path.unlink()
+
+
+# the store used by all of gibberify
+store = DataStore(data)
+
+
+def access_data(data_type, lang_in, lang_out=None, write_data=None):
+    """
+    utility function to load or write data files. When reading, a file in the compact
+    binary format is preferred to the pickled one, if present
+    :param data_type: type of data to access (raw, words, syllables or dicts)
+    :param lang_in: (input) language code
+    :param lang_out: output language code.
+    :param write_data: data pickleable format. If not present, data is read from file and returned instead
+    :return: contents of the file in pickleable format, if any
+    """
+    if write_data:
+        store.save(data_type, write_data, lang_in, lang_out)
+    else:
+        return store.load(data_type, lang_in, lang_out)
@@ -1,8 +1,103 @@
 # Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
 
+import pytest
 from gibberify import Config, build
+from gibberify.utils import DataStore
+from gibberify.generate.syllables import GibPool
+from gibberify.generate.dicts import GibDict
+from gibberify.generate.manifest import Manifest, InputHasher, needed_pools, stale_pools, stale_dicts
+from gibberify.generate.scheduler import Scheduler
 
 
 # def test_build():
 #     cfg = Config.from_default()
 #     build(cfg, from_raw=True, force_syl_rebuild=True)
+
+
+@pytest.fixture
+def conf():
+    return {
+        'real_langs': ['en', 'it'],
+        'gib_langs': {
+            'orc': {'pool': ['de'], 'enrich': [], 'impoverish': [], 'remove': []},
+            'elv': {'pool': ['en'], 'enrich': [], 'impoverish': [], 'remove': []},
+        }
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DataStore(tmp_path)
+    for lang in ('en', 'it', 'de'):
+        store.save('syllables', GibPool(lang, [lang]), lang)
+    return store
+
+
+def test_manifest(tmp_path):
+    manifest = Manifest(path=tmp_path/'manifest.json')
+    assert not manifest
+    manifest['en-orc'] = 'abc'
+    manifest.write()
+    assert Manifest(path=tmp_path/'manifest.json') == {'en-orc': 'abc'}
+
+
+def test_stale_pools(conf, store):
+    assert needed_pools(conf) == ['de', 'en', 'it']
+    assert stale_pools(conf, store=store) == []
+    assert stale_pools(conf, force=True, store=store) == ['de', 'en', 'it']
+    store.path('syllables', 'it').unlink()
+    assert stale_pools(conf, store=store) == ['it']
+
+
+def test_stale_dicts(conf, store, tmp_path):
+    manifest = Manifest(path=tmp_path/'manifest.json')
+    stale = stale_dicts(conf, manifest, InputHasher(store))
+    assert len(stale) == 4
+
+    # pretend everything was built
+    for (real_lang, gib_lang), digest in stale.items():
+        store.save('dicts', GibDict(real_lang, gib_lang, {}), real_lang, gib_lang)
+        store.save('dicts', GibDict(gib_lang, real_lang, {}), gib_lang, real_lang)
+        manifest[f'{real_lang}-{gib_lang}'] = digest
+    assert stale_dicts(conf, manifest, InputHasher(store)) == {}
+    assert len(stale_dicts(conf, manifest, InputHasher(store), force=True)) == 4
+
+    # changing the configuration of a language only affects its dictionaries
+    conf['gib_langs']['orc']['enrich'] = ['k']
+    assert set(stale_dicts(conf, manifest, InputHasher(store))) == {('en', 'orc'), ('it', 'orc')}
+    conf['gib_langs']['orc']['enrich'] = []
+
+    # so does changing one of its pools
+    store.save('syllables', GibPool('de', ['de', 'ich']), 'de')
+    assert set(stale_dicts(conf, manifest, InputHasher(store))) == {('en', 'orc'), ('it', 'orc')}
+
+    # and a missing file
+    store.path('dicts', 'elv', 'it').unlink()
+    assert ('it', 'elv') in stale_dicts(conf, manifest, InputHasher(store))
+
+
+def write(path, deps=()):
+    for dep in deps:
+        assert dep.is_file()
+    path.write_text('done')
+
+
+def fail():
+    raise RuntimeError('nope')
+
+
+def test_scheduler(tmp_path):
+    scheduler = Scheduler(workers=2, verbose=False)
+    scheduler.add('a', write, kwargs={'path': tmp_path/'a'})
+    scheduler.add('b', write, kwargs={'path': tmp_path/'b'})
+    scheduler.add('c', write, deps=['a', 'b'], kwargs={'path': tmp_path/'c', 'deps': [tmp_path/'a', tmp_path/'b']})
+    scheduler.add('d', write, deps=['c'], kwargs={'path': tmp_path/'d'}, when_ready=lambda: False)
+    scheduler.add('e', fail)
+    scheduler.add('f', write, deps=['e', 'a'], kwargs={'path': tmp_path/'f'})
+    status = scheduler.run()
+    assert status == {'a': 'done', 'b': 'done', 'c': 'done', 'd': 'up to date', 'e': 'failed', 'f': 'skipped'}
+    assert (tmp_path/'c').is_file()
+    assert not (tmp_path/'d').exists()
+    assert set(scheduler.times) == {'a', 'b', 'c'}
+    with pytest.raises(ValueError):
+        scheduler.add('g', write, deps=['nope'])
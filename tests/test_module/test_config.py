@@ -1,7 +1,9 @@
 # Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
 
 import json
+import pytest
 from gibberify import Config
+from gibberify.config import ConfigError
 
 
 def test_from_default():
@@ -25,3 +27,20 @@ def test_write():
     with open(cfg.path, 'r') as f:
         conf = json.load(f)
     assert conf == dummy
+
+
+def test_seed():
+    conf = {'real_langs': ['en'], 'gib_langs': {'orc': {'pool': ['en'], 'seed': 42}}}
+    assert Config(conf)['gib_langs']['orc']['seed'] == 42
+    for seed in ('42', True, [42]):
+        conf['gib_langs']['orc']['seed'] = seed
+        with pytest.raises(TypeError):
+            Config(conf)
+
+
+def test_mapping():
+    conf = {'real_langs': ['en'], 'gib_langs': {'orc': {'pool': ['en'], 'mapping': 'length'}}}
+    assert Config(conf)['gib_langs']['orc']['mapping'] == 'length'
+    conf['gib_langs']['orc']['mapping'] = 'frequency'
+    with pytest.raises(ConfigError):
+        Config(conf)
@@ -1,9 +1,15 @@
 # Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
 
+import os
+import pickle
+import random
 import pytest
 from gibberify import Scrambler
-from gibberify.utils import access_data
-from gibberify.generate.dicts import GibDict
+from gibberify.utils import access_data, DataStore
+from gibberify.generate.dicts import GibDict, PoolCache
+from gibberify.generate.syllables import GibPool
+from gibberify.translate import degibberify
+from gibberify.translate.reverse import get_engine
 
 
 @pytest.fixture
@@ -50,15 +56,115 @@ def test_make_reverse(scr):
     scr.dict_straight = {'test': 'word'}
     dict_reverse = scr._make_reverse()
     assert isinstance(dict_reverse, dict)
-    # TODO this thing shouldn't be a string sometimes and an int ome other time!
-    assert dict_reverse == {4: {'word': 'test'}}
+    assert dict_reverse == {'word': 'test'}
+    assert dict_reverse.trie == {'w': {'o': {'r': {'d': {'': 'test'}}}}}
 
 
 def test_write(scr):
     scr.dict_straight = GibDict('en', 'orc', {}, {'test': 'word'})
-    scr.dict_reverse = GibDict('orc', 'en', {}, {'4': {'word': 'test'}}, reverse=True)
+    scr.dict_reverse = GibDict('orc', 'en', {}, {'word': 'test'}, reverse=True)
     scr._save()
     straight = access_data('dicts', 'en', 'orc')
     reverse = access_data('dicts', 'orc', 'en')
     assert scr.dict_straight == straight
     assert scr.dict_reverse == reverse
+
+
+def test_gib_dict_random_syllable():
+    gib_dict = GibDict('en', 'orc', {}, {'a': 'x', 'b': 'y', 'c': 'z'})
+    picks = [gib_dict.random_syllable(random.Random(42)) for _ in range(3)]
+    assert len(set(picks)) == 1
+    assert picks[0] in gib_dict
+    gib_dict['d'] = 'w'
+    gib_dict.invalidate()
+    assert 'd' in gib_dict.derived('keys', tuple)
+    restored = pickle.loads(pickle.dumps(gib_dict))
+    assert restored == gib_dict
+    assert '_derived' not in restored.__dict__
+    assert restored.random_syllable() in gib_dict
+
+
+def test_pool_cache(tmp_path):
+    store = DataStore(tmp_path)
+    store.save('syllables', GibPool('en', ['te', 'st']), 'en')
+    store.save('syllables', GibPool('de', ['ich', 'te']), 'de')
+    cache = PoolCache(store)
+    en = cache.get('en')
+    assert en == ['te', 'st']
+    assert cache.get('en') is en
+    assert cache.merged(['en', 'de']) == ('ich', 'st', 'te')
+    assert cache.merged(['en', 'de']) is cache.merged(['en', 'de'])
+    # regenerated pools are reloaded
+    store.save('syllables', GibPool('de', ['du']), 'de')
+    os.utime(store.path('syllables', 'de'), ns=(0, 0))
+    assert cache.merged(['en', 'de']) == ('du', 'st', 'te')
+    # preloading skips missing pools and the ones already loaded
+    cache.clear()
+    cache.preload(['en', 'de', 'xx'])
+    assert set(cache._pools) == {'en', 'de'}
+    en = cache.get('en')
+    cache.preload(['en'])
+    assert cache.get('en') is en
+
+
+def test_seed():
+    def make(seed):
+        scr = Scrambler('en', 'orc', {'pool': ['en'], 'enrich': ['t'], 'impoverish': ['o'], 'remove': [], 'seed': seed})
+        scr.real_pool = [f'syl{i}' for i in range(50)]
+        scr.gib_pool_raw = [f'gib{i}' for i in range(20)] + ['tot', 'oto']
+        scr.gib_pool = scr._create_gib_pool()
+        return pickle.dumps(scr._make_straight())
+
+    assert make(1) == make(1)
+    assert make(1) != make(2)
+
+
+def test_create_gib_pool_distribution(scr):
+    scr.gib_conf = {'pool': ['en'], 'enrich': ['a', 'a'], 'impoverish': ['b'], 'remove': ['c']}
+    scr.gib_pool_raw = ['a', 'ab', 'x', 'c', 'ac'] * 4000
+    counts = {syl: scr._create_gib_pool().count(syl) / 4000 for syl in ('a', 'ab', 'x', 'c', 'ac')}
+    assert counts['a'] == 1
+    assert counts['c'] == counts['ac'] == 0
+    assert counts['ab'] == pytest.approx(0.5, abs=0.05)
+    assert counts['x'] == pytest.approx(0.25, abs=0.05)
+
+
+def test_make_straight_bigger_real_pool(scr):
+    scr.real_pool = [f'syl{i}' for i in range(10)]
+    scr.gib_pool = ['a', 'b', 'c']
+    dict_straight = scr._make_straight()
+    assert scr.gib_pool == ['a', 'b', 'c']
+    assert list(dict_straight) == scr.real_pool
+    counts = [list(dict_straight.values()).count(syl) for syl in scr.gib_pool]
+    assert sorted(counts) == [3, 3, 4]
+
+
+def test_length_mapping(scr):
+    scr.gib_conf = dict(scr.gib_conf, mapping='length')
+    scr.real_pool = ['a', 'b', 'cc', 'dd', 'eee', 'fff']
+    scr.gib_pool = ['xxx', 'y', 'zz']
+    dict_straight = scr._make_straight()
+    assert {syl: len(dict_straight[syl]) for syl in scr.real_pool} == {
+        'a': 1, 'b': 1, 'cc': 2, 'dd': 2, 'eee': 3, 'fff': 3
+    }
+
+
+def test_reverse_trie(scr):
+    scr.dict_straight = GibDict('en', 'orc', {}, {'te': 'stu', 'st': 'ff'})
+    rev = pickle.loads(pickle.dumps(scr._make_reverse()))
+    assert get_engine(rev).root is rev.trie
+    assert degibberify(rev, 'stuff') == 'test'
+    rev['x'] = 'y'
+    rev.invalidate()
+    assert not hasattr(rev, 'trie')
+
+
+def test_seed_per_real_lang():
+    gib_conf = {'pool': ['en'], 'enrich': [], 'impoverish': [], 'remove': [], 'seed': 1}
+    mappings = []
+    for real_lang in ('en', 'it'):
+        scr = Scrambler(real_lang, 'orc', gib_conf)
+        scr.real_pool = [f'syl{i}' for i in range(50)]
+        scr.gib_pool = [f'gib{i}' for i in range(50)]
+        mappings.append(list(scr._make_straight().values()))
+    assert mappings[0] != mappings[1]
@@ -0,0 +1,76 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+import io
+import pickle
+import tarfile
+import pytest
+from gibberify.generate.sources import LocalSource, HTTPSource, get_source
+from gibberify.generate.syllables import GibPool
+
+
+def test_get_source(tmp_path):
+    assert isinstance(get_source(), HTTPSource)
+    assert get_source('https://example.com/data/').url('words', 'en') == 'https://example.com/data/words/en.p'
+    assert isinstance(get_source(tmp_path), LocalSource)
+
+
+def test_local_tarball(tmp_path, monkeypatch):
+    (tmp_path/'data'/'syllables').mkdir(parents=True)
+    with open(tmp_path/'data'/'syllables'/'en.p', 'wb') as f:
+        pickle.dump(GibPool('en', ['more', 'stuff']), f)
+    with tarfile.open(tmp_path/'data.tar.gz', 'w:gz') as tar:
+        tar.add(tmp_path/'data', arcname='gibberify-data-master')
+
+    opened = []
+    tar_open = tarfile.open
+    monkeypatch.setattr(tarfile, 'open', lambda *args, **kwargs: opened.append(args) or tar_open(*args, **kwargs))
+    source = LocalSource(tmp_path/'data.tar.gz', cache_dir=tmp_path/'cache')
+    source.prefetch([('syllables', 'en')])
+    for _ in range(2):
+        with source.open('syllables', 'en') as f:
+            assert pickle.load(f) == ['more', 'stuff']
+    # the archive is extracted only once
+    assert len(opened) == 1
+
+
+def test_http_cache(tmp_path, monkeypatch):
+    source = HTTPSource(cache_dir=tmp_path)
+    (tmp_path/'words').mkdir()
+    (tmp_path/'words'/'en.p').write_bytes(b'cached')
+
+    def offline(*args):
+        raise AssertionError('cached data should not be downloaded')
+    monkeypatch.setattr(source, '_download', offline)
+
+    source.prefetch([('words', 'en')])
+    with source.open('words', 'en') as f:
+        assert f.read() == b'cached'
+
+
+def test_http_refresh(tmp_path, monkeypatch):
+    source = HTTPSource(cache_dir=tmp_path, refresh=True)
+    (tmp_path/'words').mkdir()
+    (tmp_path/'words'/'en.p').write_bytes(b'old')
+    downloads = []
+
+    def download(kind, lang):
+        downloads.append((kind, lang))
+        return io.BytesIO(b'new')
+    monkeypatch.setattr(source, '_download', download)
+
+    source.prefetch([('words', 'en')])
+    with source.open('words', 'en') as f:
+        assert f.read() == b'new'
+    assert downloads == [('words', 'en')]
+
+
+def test_http_failed_download(tmp_path, monkeypatch):
+    source = HTTPSource(cache_dir=tmp_path)
+
+    def fail(kind, lang):
+        raise OSError('offline')
+    monkeypatch.setattr(source, '_download', fail)
+
+    with pytest.raises(OSError):
+        source.fetch('words', 'en')
+    assert list((tmp_path/'words').iterdir()) == []
@@ -17,9 +17,17 @@ def test_syllabizer_instance(syl):
 
 
 def test_download_raw(syl):
-    raw = syl._download_raw()
-    assert isinstance(raw, list)
-    assert raw
+    with syl._download_raw() as raw:
+        assert next(iter(raw))
+
+
+def test_local_source(tmp_path):
+    (tmp_path/'dictionaries'/'en').mkdir(parents=True)
+    (tmp_path/'dictionaries'/'en'/'index.dic').write_bytes('4\nhello/AB\nNASA\nworld\nx²\n'.encode('utf-8'))
+    syl = Syllabizer(lang='en', source=tmp_path)
+    with syl._download_raw() as syl.raw:
+        words = syl._make_words()
+    assert sorted(words) == ['hello', 'world']
 
 
 def test_download_words(syl):
@@ -68,3 +76,10 @@ def test_make_syllables(syl):
     syllables = syl._make_syllables()
     assert isinstance(syllables, GibPool)
     assert syllables
+
+
+def test_make_syllables_parallel(syl):
+    syl.words = GibPool('en', ['another', 'thing', 'test', 'word', 'syllable'] * 10)
+    serial = syl._make_syllables(workers=1)
+    parallel = syl._make_syllables(workers=2, chunksize=7)
+    assert set(parallel) == set(serial)
@@ -0,0 +1,88 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+import json
+import asyncio
+import pytest
+from gibberify.utils import LRUCache
+from gibberify.generate.dicts import GibDict
+from gibberify.translate import DictLoader
+from gibberify.ui.server import Server, TranslatorPool
+
+
+@pytest.fixture
+def dicts():
+    return {
+        'en-orc': GibDict('en', 'orc', {}, {'te': 'stu', 'st': 'ff'}),
+        'orc-en': GibDict('orc', 'en', {}, {3: {'stu': 'te'}, 2: {'ff': 'st'}}, reverse=True)
+    }
+
+
+async def request(port, method, path, body=None, length=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    payload = json.dumps(body).encode('utf-8') if body is not None else b''
+    length = len(payload) if length is None else length
+    writer.write(f'{method} {path} HTTP/1.1\r\nContent-Length: {length}\r\n'
+                 f'Connection: close\r\n\r\n'.encode('latin-1') + payload)
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(content.decode('utf-8'))
+
+
+def run_server(dicts, *requests, cache=None):
+    async def main():
+        server = Server(port=0, pool=TranslatorPool(dicts, cache=cache))
+        await server.start()
+        try:
+            return await asyncio.gather(*(request(server.port, *req) for req in requests))
+        finally:
+            await server.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+def test_server(dicts):
+    responses = run_server(
+        dicts,
+        ('GET', '/health'),
+        ('GET', '/languages'),
+        ('POST', '/translate', {'from': 'en', 'to': 'orc', 'text': 'Test!'}),
+        ('POST', '/translate', {'from': 'orc', 'to': 'en', 'texts': ['stuff', 'ff stu']}),
+    )
+    assert responses == [
+        (200, {'status': 'ok'}),
+        (200, {'dicts': ['en-orc', 'orc-en']}),
+        (200, {'text': 'Stuff!'}),
+        (200, {'texts': ['test', 'st te']}),
+    ]
+
+
+def test_server_errors(dicts):
+    responses = run_server(
+        dicts,
+        ('GET', '/nope'),
+        ('GET', '/translate'),
+        ('POST', '/translate', {'text': 'test'}),
+        ('POST', '/translate', {'from': 'en', 'to': 'elv', 'text': 'test'}),
+        ('POST', '/translate', None, 'abc'),
+        ('POST', '/translate', None, -5),
+    )
+    assert [status for status, _ in responses] == [404, 405, 400, 404, 400, 400]
+
+
+def test_pool_loaded(dicts):
+    assert TranslatorPool(dicts).loaded('en', 'orc')
+    assert not TranslatorPool(DictLoader()).loaded('en', 'nope')
+
+
+def test_server_cache(dicts):
+    cache = LRUCache(10)
+    translated = run_server(dicts, ('POST', '/translate', {'from': 'en', 'to': 'orc', 'texts': ['test'] * 3}),
+                            cache=cache)
+    assert translated == [(200, {'texts': ['stuff'] * 3})]
+    status, health = run_server(dicts, ('GET', '/health'), cache=cache)[0]
+    assert (health['cache']['size'], health['cache']['hits']) == (1, 2)
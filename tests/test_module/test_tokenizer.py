@@ -0,0 +1,29 @@
+# Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
+
+import io
+from gibberify.translate.tokenizer import tokenize, chunks, WORD, SPACE, PUNCT
+
+
+def test_tokenize():
+    text = 'Hi,  there!\n'
+    tokens = list(tokenize(text))
+    assert [kind for kind, _ in tokens] == [WORD, PUNCT, SPACE, WORD, PUNCT, SPACE]
+    assert ''.join(text[start:end] for _, (start, end) in tokens) == text
+
+
+def test_tokenize_empty():
+    assert list(tokenize('')) == []
+
+
+def test_chunks():
+    text = 'some words, and-more words\n' * 50
+    pieces = list(chunks(io.StringIO(text), size=16))
+    assert ''.join(pieces) == text
+    assert all(len(piece) < 40 for piece in pieces)
+    for piece in pieces[:-1]:
+        assert not piece[-1].isalnum()
+
+
+def test_chunks_long_word():
+    text = 'a' * 100 + ' b'
+    assert ''.join(chunks(io.StringIO(text), size=16)) == text
@@ -1,8 +1,12 @@
 # Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
 
+import random
 import pytest
-from gibberify import Translator
+from gibberify import Translator, utils
+from gibberify.translate import DictLoader, ReactiveTranslator, translate, degibberify
 from gibberify.generate.dicts import GibDict
+from gibberify.translate.reverse import engines, get_engine
+from gibberify.cli import translate_message
 
 
 @pytest.fixture
@@ -17,7 +21,7 @@ def tr():
         'en-orc': GibDict('en', 'orc', conf, {'te': 'stu', 'st': 'ff'}),
         'orc-en': GibDict('orc', 'en', conf, {3: {'stu': 'te'}, 2: {'ff': 'st'}}, reverse=True)
     }
-    return Translator(lang_in='en', lang_out='orc', text_in='test', dicts=dicts)
+    return ReactiveTranslator(lang_in='en', lang_out='orc', text_in='test', dicts=dicts)
 
 
 def test_translator_instance(tr):
@@ -37,9 +41,165 @@ def test_setattr(tr):
     assert tr.text_out == 'stu'
 
 
+def test_not_reactive(tr):
+    plain = Translator('en', 'orc', 'test', dicts=tr.dicts)
+    assert plain.text_out == ''
+    plain.text_in = 'te'
+    assert plain.text_out == ''
+    assert plain() == 'stu'
+    assert plain('test') == 'stuff'
+    assert plain.translate('stuff', 'orc', 'en') == 'test'
+    assert plain.text_out == 'stuff'
+
+
+def test_translate_once(tr, monkeypatch):
+    calls = []
+    monkeypatch.setattr(utils, 'syllabize', lambda word: calls.append(word) or ['te'])
+    plain = Translator('en', 'orc', dicts=tr.dicts)
+    assert plain('test') == 'stu'
+    assert calls == ['test']
+    calls.clear()
+    assert tr('word') == 'stu'
+    assert calls == ['word']
+
+
+def test_translate_function(tr):
+    assert translate(tr.dicts['en-orc'], 'Test, te') == 'Stuff, stu'
+    assert translate(tr.dicts['orc-en'], 'stuff', engine='regex') == 'test'
+
+
 def test_degibberify(tr):
     tr.lang_in = 'orc'
     tr.lang_out = 'en'
     tr.text_in = 'stuff'
     tr.degibberify()
     assert tr.text_out == 'test'
+
+
+def test_keep_punctuation(tr):
+    tr.text_in = ' Test,  te!\n'
+    assert tr.text_out == ' Stuff,  stu!\n'
+    tr.lang_in = 'orc'
+    tr.lang_out = 'en'
+    tr.text_in = ' stuff,  ff!\n'
+    assert tr.text_out == ' test,  st!\n'
+
+
+def test_unknown_syllables_seeded(tr):
+    tr.rng = random.Random(0)
+    tr.text_in = 'unknown words'
+    first = tr.text_out
+    tr.rng = random.Random(0)
+    tr.text_in = 'unknown words again'
+    assert tr.text_out.startswith(first)
+
+
+@pytest.mark.parametrize('engine', sorted(engines))
+def test_reverse_engines(tr, engine):
+    rev = tr.dicts['orc-en']
+    assert get_engine(rev, engine).translate('stuff ffx') == 'test stx'
+
+
+def test_reverse_trie_longest_match():
+    rev = GibDict('orc', 'en', {}, {1: {'a': 'x'}, 2: {'ab': 'y'}, 3: {'abc': 'z'}}, reverse=True)
+    assert get_engine(rev, 'trie').translate('ababcaab d') == 'yzxy d'
+    assert get_engine(rev, 'trie') is get_engine(rev, 'trie')
+
+
+def test_reverse_overlapping_syllables():
+    # the trie takes the longest syllable at each position, the others the longest ones anywhere first
+    rev = GibDict('orc', 'en', {}, {'ab': 'X', 'bcd': 'Y', 'a': '1', 'cd': '2'}, reverse=True)
+    assert degibberify(rev, 'abcd') == 'X2'
+    assert degibberify(rev, 'abcd', engine='regex') == '1Y'
+    assert degibberify(rev, 'abcd', engine='loop') == '1Y'
+
+
+def test_degibberify_repeated_syllables(tr):
+    tr.lang_in = 'orc'
+    tr.lang_out = 'en'
+    tr.text_in = 'stuff stu'
+    assert tr.text_out == 'test te'
+
+
+def test_reverse_regex_escape():
+    rev = GibDict('orc', 'en', {}, {'a.': 'x', 'b': 'yy'}, reverse=True)
+    assert get_engine(rev, 'regex').translate('a.bab') == 'xyyayy'
+    assert get_engine(rev, 'loop').translate('ab') == 'ayy'
+
+
+def test_dict_loader():
+    gib_dict = GibDict('en', 'tst', {}, {'te': 'stu'})
+    utils.access_data('dicts', 'en', 'tst', write_data=gib_dict)
+    try:
+        dicts = DictLoader()
+        assert 'en-tst' in dicts.available()
+        assert not dict.__contains__(dicts, 'en-tst')
+        assert 'en-tst' in dicts
+        assert dicts['en-tst'] == gib_dict
+        assert dict.__contains__(dicts, 'en-tst')
+        with pytest.raises(KeyError):
+            dicts['en-nope']
+        tr = Translator('en', 'tst', 'te', dicts=dicts)
+        assert tr() == 'stu'
+    finally:
+        (utils.data/'dicts'/'en-tst.p').unlink()
+
+
+def test_binary_dicts(tr, tmp_path):
+    for code, gib_dict in tr.dicts.items():
+        utils.write_binary(tmp_path/f'{code}.gib', gib_dict)
+    dicts = {code: utils.open_binary(tmp_path/f'{code}.gib') for code in tr.dicts}
+    tr = ReactiveTranslator('en', 'orc', 'test', dicts=dicts)
+    assert tr.text_out == 'stuff'
+    tr.lang_in = 'orc'
+    tr.lang_out = 'en'
+    tr.text_in = 'stuff stu'
+    assert tr.text_out == 'test te'
+
+
+def test_stream(tr):
+    assert list(tr.stream(['test ', 'te', 'te'])) == ['stuff ', 'stu', 'stu']
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_translate_many(tr, workers):
+    texts = ['test', 'te', 'Test st'] * 10
+    assert tr.translate_many(texts, workers=workers, chunksize=4) == ['stuff', 'stu', 'Stuff ff'] * 10
+    assert tr.translate_many(['stuff'], 'orc', 'en', workers=workers) == ['test']
+
+
+def test_translate_many_workers_seed_and_cache(tr):
+    def run(chunksize):
+        translator = Translator('en', 'orc', dicts=tr.dicts, rng=random.Random(3), cache=10)
+        texts = ['unknown words', 'test', 'other things', 'test']
+        return translator.translate_many(texts, workers=2, chunksize=chunksize), translator.cache
+
+    (first, cache), (second, _) = run(1), run(3)
+    assert first == second
+    assert first[1] == first[3] == 'stuff'
+    # only the deterministic result was cached
+    assert len(cache) == 1
+
+
+def test_result_cache(tr):
+    tr = Translator('en', 'orc', dicts=tr.dicts, cache=10)
+    assert tr.translate('test') == 'stuff'
+    assert tr.translate('test') == 'stuff'
+    assert tr.translate('ff', 'orc', 'en') == 'st'
+    assert tr.translate('ff', 'orc', 'en') == 'st'
+    assert tr.cache.stats()['hits'] == 2
+    # unknown syllables get random translations, which must not be cached
+    tr.translate('unknown')
+    tr.translate('unknown')
+    assert tr.cache.stats()['hits'] == 2
+    assert len(tr.cache) == 2
+    # replaced dictionaries make old results useless
+    tr.dicts = dict(tr.dicts, **{'en-orc': GibDict('en', 'orc', {}, {'te': 'a', 'st': 'b'})})
+    assert tr.translate('test') == 'ab'
+
+
+@pytest.mark.parametrize('message', [['some', 'text'], ['-']])
+def test_translate_message_missing_dict(message):
+    with pytest.raises(SystemExit) as e:
+        translate_message(message, 'en', 'nope')
+    assert 'no dictionary' in str(e.value)
@@ -1,7 +1,12 @@
 # Copyright 2019-2019 the gibberify authors. See copying.md for legal info.
 
+import pickle
+import threading
+import pytest
 from pathlib import Path
 from gibberify import utils
+from gibberify.generate.dicts import GibDict
+from gibberify.generate.syllables import GibPool
 
 
 def test_globals():
@@ -16,4 +21,143 @@ def test_globals():
 
 
 def test_syllabize():
-    assert utils.syllabize('test') == ['te', 'st']
\ No newline at end of file
+    assert utils.syllabize('test') == ['te', 'st']
+
+
+def test_hyphenator_registry():
+    registry = utils.HyphenatorRegistry(langs=['en', 'it'])
+    assert not registry.loaded
+    hyphs = registry.get()
+    assert len(hyphs) == 2
+    assert registry.get() is hyphs
+    registry.configure(['de'])
+    assert not registry.loaded
+    assert len(registry.get()) == 1
+    registry.reset()
+    assert not registry.loaded
+
+
+def test_lru_cache():
+    cache = utils.LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    stats = cache.stats()
+    assert stats['size'] == 2
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 1, 1)
+
+
+def test_lru_cache_ttl():
+    now = [0]
+    cache = utils.LRUCache(ttl=10, clock=lambda: now[0])
+    cache.put('a', 1)
+    now[0] = 5
+    assert cache.get('a') == 1
+    now[0] = 10
+    assert 'a' not in cache
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+    assert len(cache) == 0
+
+
+def test_lru_cache_threads():
+    cache = utils.LRUCache(maxsize=100)
+
+    def work(n):
+        for i in range(1000):
+            cache.put((n, i), i)
+            cache.get((n, i - 1))
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert stats['size'] == 100
+    assert stats['hits'] + stats['misses'] == 8000
+    assert stats['evictions'] == 8000 - 100
+
+
+def test_syllable_cache(tmp_path):
+    utils.syllable_cache.clear()
+    assert utils.syllabize('test') == ['te', 'st']
+    assert utils.syllabize('Test') == ['te', 'st']
+    assert utils.syllable_cache.stats()['hits'] == 1
+    path = tmp_path/'syllables.cache'
+    utils.syllable_cache.save(path)
+    restored = utils.PersistentLRUCache(tag=utils.syllable_cache.tag)
+    assert restored.load(path) == 1
+    assert restored.get('test') == ('te', 'st')
+    assert utils.PersistentLRUCache(tag='other').load(path) == 0
+
+
+def test_binary_dict(tmp_path):
+    gib_dict = GibDict('en', 'orc', {'pool': ['en']}, {'te': 'stu', 'st': 'ff', 'à': 'ü'})
+    path = tmp_path/'en-orc.gib'
+    utils.write_binary(path, gib_dict)
+    mapped = utils.open_binary(path)
+    assert isinstance(mapped, utils.MappedDict)
+    assert dict(mapped) == gib_dict
+    assert mapped['à'] == 'ü'
+    assert mapped.get('nope') is None
+    assert (mapped.lang_in, mapped.lang_out, mapped.conf, mapped.reverse) == ('en', 'orc', {'pool': ['en']}, False)
+    assert mapped.random_syllable() in gib_dict
+
+
+def test_binary_reverse_dict(tmp_path):
+    rev = GibDict('orc', 'en', {}, {3: {'stu': 'te'}, 2: {'ff': 'st'}}, reverse=True)
+    path = tmp_path/'orc-en.gib'
+    utils.write_binary(path, rev)
+    assert dict(utils.open_binary(path)) == {'stu': 'te', 'ff': 'st'}
+
+
+def test_binary_pool(tmp_path):
+    pool = GibPool('en', ['te', 'st', 'ab'])
+    path = tmp_path/'en.gib'
+    utils.write_binary(path, pool)
+    mapped = utils.open_binary(path)
+    assert isinstance(mapped, utils.MappedPool)
+    assert list(mapped) == ['ab', 'st', 'te']
+    assert 'st' in mapped
+    assert 'xx' not in mapped
+    assert mapped.lang == 'en'
+
+
+def test_binary_version(tmp_path):
+    path = tmp_path/'en.gib'
+    utils.write_binary(path, GibPool('en', ['te']))
+    content = bytearray(path.read_bytes())
+    # bump format version
+    content[4] += 1
+    path.write_bytes(content)
+    with pytest.raises(utils.VersionError):
+        utils.open_binary(path)
+
+
+def test_binary_convert(tmp_path):
+    (tmp_path/'syllables').mkdir()
+    with open(tmp_path/'syllables'/'en.p', 'wb') as f:
+        pickle.dump(GibPool('en', ['te', 'st']), f)
+    converted = utils.convert_all(tmp_path)
+    assert converted == [tmp_path/'syllables'/'en.gib']
+    assert list(utils.open_binary(converted[0])) == ['st', 'te']
+
+
+def test_data_store(tmp_path):
+    store = utils.DataStore(tmp_path/'data')
+    store.save('syllables', GibPool('en', ['te']), 'en')
+    store.save('syllables', GibPool('it', ['ci']), 'it')
+    assert (tmp_path/'data'/'dicts').is_dir()
+    assert store.load('syllables', 'en') == ['te']
+    utils.write_binary(tmp_path/'data'/'syllables'/'it.gib', GibPool('it', ['ao']))
+    loaded = store.load_many('syllables', ['en', 'it'])
+    assert list(loaded['en']) == ['te']
+    assert list(loaded['it']) == ['ao']
+    store.save('syllables', GibPool('it', ['ci']), 'it')
+    assert not (tmp_path/'data'/'syllables'/'it.gib').exists()
+    with pytest.raises(ValueError):
+        store.load('nope', 'en')